@@ -0,0 +1,64 @@
+"""Общие помощники для команд-бенчмарков (bench_*)."""
+import json
+import resource
+import time
+from contextlib import contextmanager
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """Перцентили по методу ближайшего ранга."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f'p{point}': None for point in points}
+    result = {}
+    for point in points:
+        rank = max(int(round(point / 100 * len(ordered))) - 1, 0)
+        result[f'p{point}'] = ordered[min(rank, len(ordered) - 1)]
+    return result
+
+
+def peak_rss_kb():
+    """Пиковый RSS процесса в килобайтах (ru_maxrss в Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def write_results(path, results):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def compare(results, baseline, tolerance=0.2,
+            metrics=('p90_ms', 'queries', 'peak_kb')):
+    """Регрессии относительно baseline: [(имя, метрика, было, стало)].
+
+    Число запросов не должно расти вовсе, остальные метрики — больше
+    чем на долю tolerance.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in metrics:
+            before, after = previous.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            limit = before if metric == 'queries' else before * (1 + tolerance)
+            if after > limit:
+                regressions.append((name, metric, before, after))
+    return regressions
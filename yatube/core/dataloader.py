@@ -0,0 +1,173 @@
+"""Загрузка данных страницы в стиле DataLoader.
+
+Вью сначала описывает, что ей нужно: load() по ключу через пакетную
+функцию и defer() для отдельных запросов, — а данные получает через
+get(). Первый get() выполняет всё накопленное разом: ключи одной
+пакетной функции уходят одним запросом, повторные ключи берутся из
+кэша запроса, а независимые пачки и отложенные вызовы идут параллельно:
+один в потоке запроса, остальные в общем пуле из DATALOADER_THREADS
+потоков. Поэтому запрос не встаёт в очередь целиком, даже когда пул
+занят другими запросами.
+
+Параллельно выполняется только то, что увидит те же данные в другом
+соединении: внутри транзакции и с базой в памяти всё идёт по очереди
+в потоке запроса. Обращения, которых не было благодаря пачкам и кэшу,
+считаются в round_trips_saved, а выполненные параллельно — отдельно,
+в calls_overlapped: они экономят время, но не число запросов к базе.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock, local
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import metrics
+from .db import routers
+
+_local = local()
+_executor = None
+_executor_lock = Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.DATALOADER_THREADS, thread_name_prefix='dataloader'
+            )
+        return _executor
+
+
+def can_run_concurrently():
+    """Увидят ли другие соединения то же, что соединение запроса."""
+    if settings.DATALOADER_THREADS < 2 or getattr(_local, 'worker', False):
+        return False
+    for connection in connections.all():
+        if connection.in_atomic_block:
+            return False
+        if getattr(connection, 'is_in_memory_db', lambda: False)():
+            return False
+    return True
+
+
+def _run_in_worker(call, router_state, parent_metrics):
+    _local.worker = True
+    try:
+        with routers.inherit(router_state), metrics.worker(parent_metrics):
+            return call()
+    finally:
+        _local.worker = False
+        close_old_connections()
+
+
+class Deferred:
+    """Значение, которое появится после dispatch()."""
+
+    __slots__ = ('data', 'resolved', 'value')
+
+    def __init__(self, data):
+        self.data = data
+        self.resolved = False
+        self.value = None
+
+    def resolve(self, value):
+        self.value = value
+        self.resolved = True
+
+    def get(self):
+        if not self.resolved:
+            self.data.dispatch()
+        return self.value
+
+
+class DataLoader:
+    """Пакетная загрузка по ключам одной функцией batch_load.
+
+    batch_load(keys) получает список уникальных ключей и возвращает
+    словарь {ключ: значение}; для ненайденных ключей get() вернёт None.
+    """
+
+    def __init__(self, data, batch_load):
+        self.data = data
+        self.batch_load = batch_load
+        self.cache = {}
+        self.queue = []
+
+    def load(self, key):
+        if key in self.cache:
+            self.data.saved(1)
+            return self.cache[key]
+        deferred = self.cache[key] = Deferred(self.data)
+        if self.queue:
+            self.data.saved(1)
+        else:
+            self.data.pending.append(self.dispatch)
+        self.queue.append(key)
+        return deferred
+
+    def dispatch(self):
+        keys, self.queue = self.queue, []
+        values = self.batch_load(keys)
+        for key in keys:
+            self.cache[key].resolve(values.get(key))
+
+
+class RequestData:
+    """Загрузчики и отложенные вызовы одного запроса."""
+
+    def __init__(self):
+        self.loaders = {}
+        self.pending = []
+        self.round_trips_saved = 0
+        self.calls_overlapped = 0
+
+    def saved(self, count):
+        self.round_trips_saved += count
+        metrics.record_round_trips_saved(count)
+
+    def overlapped(self, count):
+        self.calls_overlapped += count
+        metrics.record_calls_overlapped(count)
+
+    def load(self, batch_load, key):
+        if batch_load not in self.loaders:
+            self.loaders[batch_load] = DataLoader(self, batch_load)
+        return self.loaders[batch_load].load(key)
+
+    def defer(self, call):
+        deferred = Deferred(self)
+        self.pending.append(lambda: deferred.resolve(call()))
+        return deferred
+
+    def dispatch(self):
+        """Выполняет всё накопленное; параллельно, если можно."""
+        calls, self.pending = self.pending, []
+        if len(calls) < 2 or not can_run_concurrently():
+            for call in calls:
+                call()
+            return
+        router_state = routers.state()
+        parent_metrics = metrics.current()
+        first, *rest = calls
+        futures = [
+            executor().submit(
+                _run_in_worker, call, router_state, parent_metrics
+            )
+            for call in rest
+        ]
+        try:
+            first()
+        finally:
+            wait(futures)
+        for future in futures:
+            future.result()
+        self.overlapped(len(rest))
+
+
+def for_request(request):
+    """RequestData запроса; создаётся при первом обращении."""
+    data = getattr(request, '_request_data', None)
+    if data is None:
+        data = request._request_data = RequestData()
+    return data
@@ -0,0 +1,36 @@
+"""SQLite с прагмами для работы под нагрузкой.
+
+Прагмы выполняются один раз при открытии соединения, а с CONN_MAX_AGE
+соединение вместе с ними переживает запрос. WAL позволяет читать во
+время записи, synchronous=NORMAL в WAL не теряет целостность базы,
+busy_timeout заставляет писателей ждать блокировку, а не падать.
+OPTIONS['pragmas'] дополняет PRAGMAS; значение None отключает прагму.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        if value is not None:
+            connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.pragmas)
+        return connection
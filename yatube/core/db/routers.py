@@ -0,0 +1,115 @@
+"""Чтение с реплик для вью, помеченных replica_reads.
+
+Реплики перечислены в DATABASE_REPLICAS. Роутер отправляет чтение на
+случайную реплику, только пока выполняется помеченное вью; всё
+остальное — команды, фоновые потоки, запись и чтение внутри
+транзакции — идёт на основную базу. Если запрос что-то записал (это
+отмечает track_writes по выполненному SQL, а не вопрос роутеру о базе
+для записи, который Django задаёт и без записи), ReplicaRoutingMiddleware
+ставит cookie REPLICA_PIN_COOKIE, и следующие
+REPLICA_PIN_SECONDS секунд этот клиент читает с основной базы, чтобы
+видеть свои изменения, пока реплика не догнала.
+"""
+import random
+from contextlib import contextmanager
+from functools import wraps
+from threading import local
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = local()
+
+
+def begin(pinned=False):
+    _state.pinned = pinned
+    _state.replica = False
+    _state.wrote = False
+    # Общее с рабочими потоками (см. inherit): отмечают и они.
+    _state.replicas_used = set()
+
+
+def end():
+    """Сбрасывает состояние запроса; возвращает, была ли запись."""
+    wrote = getattr(_state, 'wrote', False)
+    begin()
+    return wrote
+
+
+WRITE_SQL = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper: отмечает запрос, если SQL меняет данные."""
+    if sql.lstrip().upper().startswith(WRITE_SQL):
+        _state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def used_replica():
+    """Читал ли текущий запрос с реплики."""
+    return bool(getattr(_state, 'replicas_used', None))
+
+
+@contextmanager
+def reading_replica():
+    previous = getattr(_state, 'replica', False)
+    _state.replica = True
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def state():
+    """Состояние запроса для передачи в рабочий поток."""
+    return dict(vars(_state))
+
+
+@contextmanager
+def inherit(values):
+    """Рабочий поток маршрутизирует чтение так же, как запрос."""
+    vars(_state).update(values)
+    try:
+        yield
+    finally:
+        vars(_state).clear()
+
+
+def replica_reads(view):
+    """Разрешает вью читать с реплики."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not getattr(_state, 'replica', False)
+            or getattr(_state, 'pinned', False)
+            or getattr(_state, 'wrote', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        alias = random.choice(replicas)
+        used = getattr(_state, 'replicas_used', None)
+        if used is not None:
+            used.add(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
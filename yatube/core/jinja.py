@@ -0,0 +1,107 @@
+"""Jinja2 для лент постов (TEMPLATES с NAME 'jinja2').
+
+Модуль импортирует jinja2, поэтому settings подключает его, только если
+пакет установлен. Окружение повторяет то, чем пользуются шаблоны лент
+на языке Django: url (через fast_url), static, thumbnail из sorl,
+фильтры date и addclass и кэш фрагментов; year и user дают те же
+контекстные процессоры, карточки постов добавляет posts/jinja.py.
+Шаблоны лежат в каталоге jinja2_templates/, вью переключаются списком
+POSTS_JINJA2_VIEWS.
+"""
+import logging
+
+import jinja2
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.backends.jinja2 import Jinja2 as Jinja2Backend
+from django.template.backends.jinja2 import Template as Jinja2Template
+from django.template.defaultfilters import date as date_filter
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from markupsafe import Markup
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from . import metrics
+from .fast_urls import fast_url
+from .templatetags.user_filters import addclass
+
+logger = logging.getLogger(__name__)
+
+
+def url(viewname, *args, **kwargs):
+    if len(args) == 1 and not kwargs:
+        return fast_url(viewname, args[0])
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def date(value, arg=None):
+    """Фильтр date из Django с переводом в текущую часовую зону."""
+    return date_filter(template_localtime(value), arg)
+
+
+def thumbnail(file_, geometry, **options):
+    """Миниатюра sorl или None, как тег {% thumbnail %} без as-блока."""
+    if not file_:
+        return None
+    try:
+        return get_thumbnail(file_, geometry, **options)
+    except Exception:
+        if sorl_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Thumbnail tag failed')
+        return None
+
+
+def fragment_cache():
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def cache(timeout, fragment_name, *vary_on, caller):
+    """{% call cache(20, 'name', value) %}...{% endcall %} как {% cache %}.
+
+    Ключ как у {% cache %}, но с префиксом jinja2, чтобы фрагменты двух
+    движков не подменяли друг друга.
+    """
+    key = 'jinja2.' + make_template_fragment_key(fragment_name, vary_on)
+    backend = fragment_cache()
+    content = backend.get(key)
+    if content is None:
+        content = caller()
+        backend.set(key, content, timeout)
+    return Markup(content)
+
+
+def environment(**options):
+    # Как и в шаблонах Django, неизвестная переменная выводится пустой.
+    options['undefined'] = jinja2.Undefined
+    env = jinja2.Environment(**options)
+    env.globals.update(
+        url=url,
+        static=static,
+        thumbnail=thumbnail,
+        cache=cache,
+    )
+    env.filters.update(date=date, addclass=addclass)
+    return env
+
+
+class Template(Jinja2Template):
+    def render(self, context=None, request=None):
+        with metrics.rendering():
+            return super().render(context, request)
+
+
+class Jinja2(Jinja2Backend):
+    """Бэкенд Jinja2, отмечающий время рендеринга в core.metrics."""
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return Template(template.template, self)
+
+    def from_string(self, template_code):
+        return Template(self.env.from_string(template_code), self)
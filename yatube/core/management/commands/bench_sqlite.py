@@ -0,0 +1,148 @@
+import os
+import tempfile
+import time
+from threading import Barrier, Thread
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.db.utils import load_backend
+
+from core.benchmarks import percentiles, write_results
+
+PROFILES = {
+    'stock': ('django.db.backends.sqlite3', {}),
+    'tuned': ('core.db.backends.sqlite3', {}),
+}
+
+SCHEMA = (
+    'CREATE TABLE bench_post ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, author_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, pub_date REAL NOT NULL)',
+    'CREATE INDEX bench_post_pub_date ON bench_post (pub_date)',
+)
+READ_SQL = (
+    'SELECT id, author_id, text FROM bench_post '
+    'ORDER BY pub_date DESC LIMIT 10'
+)
+WRITE_SQL = (
+    'INSERT INTO bench_post (author_id, text, pub_date) VALUES (%s, %s, %s)'
+)
+
+
+def connect(engine, name, options):
+    wrapper = load_backend(engine).DatabaseWrapper({
+        'ENGINE': engine,
+        'NAME': name,
+        'OPTIONS': options,
+        'CONN_MAX_AGE': None,
+        'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False,
+        'TIME_ZONE': None,
+        'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+        'TEST': {},
+    }, 'bench')
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def worker(engine, name, options, sql, params, deadline, barrier, result):
+    wrapper = connect(engine, name, options)
+    barrier.wait()
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute(sql, params())
+                    cursor.fetchall()
+            except OperationalError:
+                result['errors'] += 1
+                continue
+            result['latencies'].append(time.perf_counter() - start)
+    finally:
+        wrapper.close()
+
+
+def run(engine, options, readers, writers, seconds, rows):
+    """Гоняет читателей и писателей на одной базе; возвращает сводку."""
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'bench.sqlite3')
+        setup = connect(engine, name, options)
+        with setup.cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany(WRITE_SQL, [
+                (number % 100, f'Пост {number}', number)
+                for number in range(rows)
+            ])
+        setup.close()
+        kinds = [('read', READ_SQL, tuple)] * readers + [
+            ('write', WRITE_SQL, lambda: (1, 'Новый пост', time.time()))
+        ] * writers
+        barrier = Barrier(len(kinds))
+        deadline = time.perf_counter() + seconds
+        results, threads = [], []
+        for kind, sql, params in kinds:
+            result = {'kind': kind, 'latencies': [], 'errors': 0}
+            results.append(result)
+            threads.append(Thread(target=worker, args=(
+                engine, name, options, sql, params, deadline, barrier, result,
+            )))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    summary = {}
+    for kind in ('read', 'write'):
+        latencies = [
+            latency for result in results if result['kind'] == kind
+            for latency in result['latencies']
+        ]
+        summary[kind] = {
+            'ops_per_s': round(len(latencies) / seconds, 1),
+            'errors': sum(
+                result['errors'] for result in results
+                if result['kind'] == kind
+            ),
+            **{
+                f'{point}_ms': round(value * 1000, 3) if value else None
+                for point, value in percentiles(latencies).items()
+            },
+        }
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения и записи SQLite '
+        'из нескольких потоков со стандартным бэкендом (stock) '
+        'и с прагмами core.db.backends.sqlite3 (tuned).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument(
+            '--profile', choices=sorted(PROFILES), action='append',
+            help='Какие настройки мерить; по умолчанию обе.',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in options['profile'] or sorted(PROFILES):
+            engine, database_options = PROFILES[profile]
+            results[profile] = summary = run(
+                engine, database_options, options['readers'],
+                options['writers'], options['seconds'], options['rows'],
+            )
+            for kind, row in summary.items():
+                self.stdout.write(
+                    f'{profile:6} {kind:5} {row["ops_per_s"]:>10} оп/с  '
+                    f'p50 {row["p50_ms"]} мс  p99 {row["p99_ms"]} мс  '
+                    f'ошибок {row["errors"]}'
+                )
+        if options['output']:
+            write_results(options['output'], results)
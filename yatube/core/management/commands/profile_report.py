@@ -0,0 +1,67 @@
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import load_profiles
+
+COLUMNS = {'cumulative': 2, 'own': 1}
+
+
+class Command(BaseCommand):
+    help = 'Сводит сохранённые профили в самые горячие функции по вью.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', default=None,
+            help='Каталог профилей; по умолчанию PROFILING_DIR.',
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--view', help='Только это имя вью.')
+        parser.add_argument(
+            '--sort', choices=sorted(COLUMNS), default='cumulative',
+            help='Сортировать по общему или собственному времени.',
+        )
+
+    def handle(self, *args, **options):
+        column = COLUMNS[options['sort']]
+        directory = options['dir'] or settings.PROFILING_DIR
+        if not os.path.isdir(directory):
+            raise CommandError(
+                f'Каталог профилей {directory} не найден: включите '
+                'PROFILING_ENABLED и снимите хотя бы один профиль.'
+            )
+        views = defaultdict(lambda: {
+            'profiles': 0,
+            'duration_ms': 0.0,
+            'functions': defaultdict(lambda: [0, 0.0, 0.0]),
+        })
+        for profile in load_profiles(directory):
+            if options['view'] and profile['view'] != options['view']:
+                continue
+            view = views[profile['view']]
+            view['profiles'] += 1
+            view['duration_ms'] += profile['duration_ms']
+            for name, calls, own, cumulative in profile['functions']:
+                totals = view['functions'][name]
+                totals[0] += calls
+                totals[1] += own
+                totals[2] += cumulative
+        for name, view in sorted(views.items()):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                '{} — профилей {}, среднее время {:.1f} мс'.format(
+                    name,
+                    view['profiles'],
+                    view['duration_ms'] / view['profiles'],
+                )
+            ))
+            hottest = sorted(
+                view['functions'].items(),
+                key=lambda item: item[1][column],
+                reverse=True,
+            )[:options['top']]
+            for function, (calls, own, cumulative) in hottest:
+                self.stdout.write(
+                    f'{cumulative:10.4f} {own:10.4f} {calls:>8}  {function}'
+                )
@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def sync(alias):
+    """Копирует основную базу SQLite в реплику через backup API."""
+    source = connections[DEFAULT_DB_ALIAS]
+    source.ensure_connection()
+    target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в реплики DATABASE_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Повторять копирование раз в --interval секунд.',
+        )
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, loop=False, interval=5.0, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Копирование реплик есть только для SQLite.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('DATABASE_REPLICAS пуст.')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                sync(alias)
+                self.stdout.write(f'Реплика {alias} обновлена')
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,233 @@
+"""Метрики запросов по имени вью: SQL, шаблоны, кэш.
+
+MetricsMiddleware заводит на время запроса сборщик RequestMetrics.
+Запросы к базе считает execute_wrapper, время шаблонов — бэкенд
+core.template_backends.InstrumentedDjangoTemplates, попадания в кэш
+отмечают сами кэши через record_cache(), сэкономленные и
+параллельные обращения к базе — core.dataloader. Итоги копятся
+в памяти процесса и отдаются в текстовом формате Prometheus
+(render_prometheus), а каждый запрос может писаться строкой JSON
+в лог yatube.metrics.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from threading import Lock, local
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger('yatube.metrics')
+
+COUNTERS = (
+    ('requests', 'Число запросов'),
+    ('queries', 'Число SQL-запросов'),
+    ('sql_seconds', 'Время SQL, с'),
+    ('render_seconds', 'Время рендеринга шаблонов, с'),
+    ('duration_seconds', 'Время ответа, с'),
+    ('cache_hits', 'Попадания в кэш'),
+    ('cache_misses', 'Промахи кэша'),
+    ('over_budget', 'Запросы сверх METRICS_QUERY_BUDGET'),
+    ('round_trips_saved', 'Сэкономленные обращения к базе (dataloader)'),
+    ('calls_overlapped', 'Обращения к базе, выполненные параллельно'),
+)
+
+_local = local()
+_totals = defaultdict(
+    lambda: dict.fromkeys((name for name, _ in COUNTERS), 0)
+)
+_totals_lock = Lock()
+_merge_lock = Lock()
+
+
+class RequestMetrics:
+    __slots__ = (
+        'queries', 'sql_seconds', 'render_seconds', 'render_depth',
+        'cache_hits', 'cache_misses', 'round_trips_saved',
+        'calls_overlapped',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.render_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.round_trips_saved = 0
+        self.calls_overlapped = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def rendering():
+    """Учитывает время шаблона; вложенные рендеры не суммируются."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics.render_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.render_depth -= 1
+        if not metrics.render_depth:
+            metrics.render_seconds += time.perf_counter() - start
+
+
+def record_cache(hit):
+    metrics = current()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def record_round_trips_saved(count):
+    metrics = current()
+    if metrics is not None:
+        metrics.round_trips_saved += count
+
+
+def record_calls_overlapped(count):
+    metrics = current()
+    if metrics is not None:
+        metrics.calls_overlapped += count
+
+
+@contextmanager
+def worker(parent):
+    """Учитывает SQL и кэш рабочего потока в метриках запроса parent."""
+    if parent is None:
+        yield
+        return
+    metrics = RequestMetrics()
+    _local.metrics = metrics
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield
+    finally:
+        _local.metrics = None
+        with _merge_lock:
+            parent.queries += metrics.queries
+            parent.sql_seconds += metrics.sql_seconds
+            parent.cache_hits += metrics.cache_hits
+            parent.cache_misses += metrics.cache_misses
+
+
+def view_name(request):
+    match = request.resolver_match
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unresolved'
+    return match.view_name
+
+
+def record(name, metrics, duration, over_budget):
+    with _totals_lock:
+        totals = _totals[name]
+        for key, value in (
+            ('requests', 1),
+            ('queries', metrics.queries),
+            ('sql_seconds', metrics.sql_seconds),
+            ('render_seconds', metrics.render_seconds),
+            ('duration_seconds', duration),
+            ('cache_hits', metrics.cache_hits),
+            ('cache_misses', metrics.cache_misses),
+            ('over_budget', int(over_budget)),
+            ('round_trips_saved', metrics.round_trips_saved),
+            ('calls_overlapped', metrics.calls_overlapped),
+        ):
+            totals[key] += value
+
+
+def snapshot():
+    with _totals_lock:
+        return {name: dict(totals) for name, totals in _totals.items()}
+
+
+def reset():
+    with _totals_lock:
+        _totals.clear()
+
+
+def render_prometheus():
+    lines = []
+    totals = snapshot()
+    for counter, description in COUNTERS:
+        metric = f'yatube_view_{counter}_total'
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} counter')
+        for name, values in sorted(totals.items()):
+            lines.append(f'{metric}{{view="{name}"}} {values[counter]}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Собирает метрики запроса; ставится первым в MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        previous = current()
+        _local.metrics = metrics
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = previous
+        duration = time.perf_counter() - start
+        name = view_name(request)
+        budget = settings.METRICS_QUERY_BUDGET
+        over_budget = bool(budget) and metrics.queries > budget
+        record(name, metrics, duration, over_budget)
+        if over_budget or settings.METRICS_LOG_REQUESTS:
+            self.log(request, response, name, metrics, duration, over_budget)
+        return response
+
+    def log(self, request, response, name, metrics, duration, over_budget):
+        line = json.dumps({
+            'view': name,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_seconds * 1000, 3),
+            'render_ms': round(metrics.render_seconds * 1000, 3),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'round_trips_saved': metrics.round_trips_saved,
+            'over_budget': over_budget,
+        }, ensure_ascii=False)
+        if over_budget:
+            logger.warning(line)
+        else:
+            logger.info(line)
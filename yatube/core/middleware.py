@@ -0,0 +1,100 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                set_response_etag)
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import metrics
+from .db import routers
+from .page_cache import fetch, page_key, store
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт анонимам помеченные суррогатными ключами страницы из кэша."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            response = self.get_response(request)
+            if hasattr(response, 'surrogate_keys'):
+                patch_cache_control(response, private=True)
+            return response
+        key = page_key(request)
+        response = fetch(key)
+        metrics.record_cache(response is not None)
+        if response is not None:
+            response['X-Page-Cache'] = 'HIT'
+            return self.conditional_response(request, response)
+        started = time.time()
+        response = self.get_response(request)
+        if self.is_cacheable_response(response):
+            set_response_etag(response)
+            if not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date()
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=settings.PAGE_CACHE_MAX_AGE,
+            )
+            store(key, response, started)
+            response['X-Page-Cache'] = 'MISS'
+        return self.conditional_response(request, response)
+
+    def is_cacheable_request(self, request):
+        return (
+            settings.PAGE_CACHE_ENABLED
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    def is_cacheable_response(self, response):
+        return (
+            response.status_code == 200
+            and hasattr(response, 'surrogate_keys')
+            and not response.streaming
+            and not response.cookies
+        )
+
+    def conditional_response(self, request, response):
+        if response.status_code != 200:
+            return response
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')
+            ),
+            response=response,
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Закрепляет за клиентом основную базу после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.begin(
+            pinned=settings.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(
+                routers.track_writes
+            ):
+                response = self.get_response(request)
+        finally:
+            wrote = routers.end()
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
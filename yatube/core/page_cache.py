@@ -0,0 +1,91 @@
+"""Кэш целых страниц для анонимных пользователей.
+
+Вью помечают ответ суррогатными ключами (tag_response), middleware
+кэширует помеченные ответы, а purge() сбрасывает ровно те страницы,
+на которых показывались изменившиеся объекты.
+
+Страницы не перечисляются под ключом тега: purge() только записывает
+время сброса тега, а fetch() отбрасывает страницу, если какой-то её
+тег сброшен после начала рендера. Так нет общего списка, который
+запросы читают и перезаписывают наперегонки, и не теряется сброс,
+пришедший, пока страница рендерилась. Часы серверов должны совпадать.
+
+Фрагменты {% cache %} внутри страниц ключуются временем сброса тега
+(purged_at), иначе страница после сброса собралась бы из старого
+фрагмента. Страница, прочитанная с реплики вскоре после сброса её
+тегов, не кэшируется: реплика могла ещё не получить изменения.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db import routers
+
+PAGE_PREFIX: str = 'page_cache:page:'
+TAG_PREFIX: str = 'page_cache:tag:'
+
+
+def page_key(request):
+    url = request.build_absolute_uri()
+    return PAGE_PREFIX + hashlib.md5(url.encode()).hexdigest()
+
+
+def tag_response(response, *keys):
+    """Помечает ответ суррогатными ключами для кэша и прокси."""
+    tags = getattr(response, 'surrogate_keys', set())
+    tags.update(str(key) for key in keys)
+    response.surrogate_keys = tags
+    response['Surrogate-Key'] = ' '.join(sorted(tags))
+    return response
+
+
+def tag_key(tag):
+    return TAG_PREFIX + str(tag)
+
+
+def fetch(key):
+    """Страница из кэша, если её теги не сбрасывались после рендера."""
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    started, tags, response = cached
+    purged = cache.get_many([tag_key(tag) for tag in tags])
+    if len(purged) < len(tags):
+        return None
+    if any(purged_at >= started for purged_at in purged.values()):
+        return None
+    return response
+
+
+def purged_at(tag):
+    """Время последнего сброса тега; 0, если кэш страниц выключен."""
+    if not settings.PAGE_CACHE_ENABLED:
+        return 0
+    return cache.get(tag_key(tag), 0)
+
+
+def store(key, response, started):
+    """Кэширует ответ, рендер которого начался в started."""
+    timeout = settings.PAGE_CACHE_TIMEOUT
+    tags = sorted(response.surrogate_keys)
+    purged = cache.get_many([tag_key(tag) for tag in tags])
+    if routers.used_replica():
+        lag = started - settings.REPLICA_PIN_SECONDS
+        if any(purged_at > lag for purged_at in purged.values()):
+            return
+    for tag in tags:
+        if tag_key(tag) not in purged:
+            cache.add(tag_key(tag), 0, timeout)
+    cache.set(key, (started, tags, response), timeout)
+
+
+def purge(*tags):
+    """Сбрасывает страницы, помеченные любым из ключей."""
+    if not settings.PAGE_CACHE_ENABLED or not tags:
+        return
+    now = time.time()
+    cache.set_many(
+        {tag_key(tag): now for tag in tags}, settings.PAGE_CACHE_TIMEOUT
+    )
@@ -0,0 +1,199 @@
+"""Профилирование медленных и случайно выбранных запросов.
+
+ProfilingMiddleware запускает cProfile на доле запросов
+PROFILING_SAMPLE_RATE. Остальные запросы, если задан PROFILING_SLOW_MS,
+наблюдает общий поток-сэмплер: раз в PROFILING_INTERVAL он снимает стек
+потока запроса, и профиль сохраняется, только если запрос оказался
+медленнее порога. Профили пишутся в PROFILING_DIR файлами JSON (для
+cProfile рядом кладётся и .prof) и сводятся командой profile_report.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from threading import Event, Lock, Thread, get_ident
+
+from django.conf import settings
+
+from .metrics import view_name
+
+MAX_FUNCTIONS: int = 300
+MAX_DEPTH: int = 200
+
+_sampler = None
+_sampler_lock = Lock()
+
+
+def function_key(code):
+    return f'{code.co_filename}:{code.co_firstlineno}({code.co_name})'
+
+
+class StackSamples:
+    def __init__(self):
+        self.count = 0
+        self.own = Counter()
+        self.total = Counter()
+
+    def add(self, frame):
+        keys = []
+        while frame is not None and len(keys) < MAX_DEPTH:
+            keys.append(function_key(frame.f_code))
+            frame = frame.f_back
+        if not keys:
+            return
+        self.count += 1
+        self.own[keys[0]] += 1
+        self.total.update(set(keys))
+
+    def functions(self, interval):
+        return [
+            [key, self.total[key], self.own[key] * interval,
+             self.total[key] * interval]
+            for key in self.total
+        ]
+
+
+class StackSampler(Thread):
+    """Один поток снимает стеки всех наблюдаемых потоков запросов."""
+
+    def __init__(self, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.interval = interval
+        self.watched = {}
+        self.lock = Lock()
+        self.wakeup = Event()
+
+    def watch(self, ident):
+        samples = StackSamples()
+        with self.lock:
+            self.watched[ident] = samples
+        self.wakeup.set()
+        return samples
+
+    def unwatch(self, ident):
+        with self.lock:
+            self.watched.pop(ident, None)
+
+    def run(self):
+        while True:
+            with self.lock:
+                idle = not self.watched
+            if idle:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, samples in self.watched.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples.add(frame)
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(settings.PROFILING_INTERVAL)
+            _sampler.start()
+        return _sampler
+
+
+def profile_functions(profiler):
+    stats = pstats.Stats(profiler)
+    return [
+        [f'{filename}:{line}({name})', calls, own, cumulative]
+        for (filename, line, name), (_, calls, own, cumulative, _)
+        in stats.stats.items()
+    ]
+
+
+def save(request, response, kind, duration, functions, profiler=None):
+    """Пишет профиль с адресом и пользователем запроса."""
+    functions.sort(key=lambda function: function[3], reverse=True)
+    name = view_name(request)
+    stem = '{}-{}-{}'.format(
+        time.strftime('%Y%m%dT%H%M%S'),
+        name.replace(':', '.'),
+        uuid.uuid4().hex[:8],
+    )
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    user = getattr(request, 'user', None)
+    data = {
+        'kind': kind,
+        'view': name,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'user_id': user.pk if user is not None else None,
+        'duration_ms': round(duration * 1000, 3),
+        'timestamp': time.time(),
+        'functions': functions[:MAX_FUNCTIONS],
+    }
+    with open(os.path.join(directory, stem + '.json'), 'w') as output:
+        json.dump(data, output)
+    if profiler is not None:
+        profiler.dump_stats(os.path.join(directory, stem + '.prof'))
+    return stem
+
+
+def load_profiles(directory):
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name)) as source:
+                yield json.load(source)
+
+
+class ProfilingMiddleware:
+    """Снимает профили выбранных и медленных запросов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            return self.profile(request)
+        if settings.PROFILING_SLOW_MS:
+            return self.sample(request)
+        return self.get_response(request)
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+        save(
+            request, response, 'cprofile', duration,
+            profile_functions(profiler), profiler,
+        )
+        return response
+
+    def sample(self, request):
+        sampler = get_sampler()
+        ident = get_ident()
+        samples = sampler.watch(ident)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.unwatch(ident)
+        duration = time.perf_counter() - start
+        if duration * 1000 >= settings.PROFILING_SLOW_MS and samples.count:
+            save(
+                request, response, 'sampler', duration,
+                samples.functions(sampler.interval),
+            )
+        return response
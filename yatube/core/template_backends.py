@@ -0,0 +1,24 @@
+"""Бэкенд шаблонов Django, отмечающий время рендеринга в core.metrics."""
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.django import reraise
+
+from . import metrics
+
+
+class Template(DjangoTemplate):
+    def render(self, context=None, request=None):
+        with metrics.rendering():
+            return super().render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,78 @@
+"""Кэширующий загрузчик шаблонов со встраиванием {% include %}.
+
+Как и стандартный cached.Loader, компилирует каждый шаблон один раз
+на процесс. Сразу после компиляции include с постоянным именем
+заменяется деревом узлов подключаемого шаблона, поэтому при рендеринге
+не ищется шаблон на каждый вызов, например в цикле по постам. Состояние
+cycle, ifchanged и им подобных, как и у обычного include, своё на каждый
+вызов. Шаблоны с extends и block, а также include с именем из переменной
+остаются обычными include.
+"""
+from django.template import TemplateDoesNotExist
+from django.template.base import Node
+from django.template.defaulttags import IfNode
+from django.template.loader_tags import BlockNode, ExtendsNode, IncludeNode
+from django.template.loaders import cached
+
+
+class InlinedIncludeNode(Node):
+    def __init__(self, include, template):
+        self.include = include
+        self.template = template
+        self.nodelist = template.nodelist
+        self.token = include.token
+        self.origin = include.origin
+
+    def render(self, context):
+        values = {
+            name: var.resolve(context)
+            for name, var in self.include.extra_context.items()
+        }
+        # Как Template.render: свой render_context на каждый вызов.
+        with context.render_context.push_state(self.template):
+            if self.include.isolated_context:
+                return self.nodelist.render(context.new(values))
+            with context.push(**values):
+                return self.nodelist.render(context)
+
+
+def child_nodelists(node):
+    if isinstance(node, IfNode):
+        return [nodelist for _, nodelist in node.conditions_nodelists]
+    return [
+        getattr(node, name) for name in node.child_nodelists
+        if getattr(node, name, None) is not None
+    ]
+
+
+class Loader(cached.Loader):
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        if not getattr(template, 'includes_inlined', False):
+            # Флаг ставится до обхода: шаблон, подключающий сам себя,
+            # не уйдёт в бесконечную рекурсию.
+            template.includes_inlined = True
+            self.inline(template.nodelist)
+        return template
+
+    def inline(self, nodelist):
+        for index, node in enumerate(nodelist):
+            if isinstance(node, IncludeNode):
+                inlined = self.inline_include(node)
+                if inlined is not None:
+                    nodelist[index] = inlined
+                continue
+            for child in child_nodelists(node):
+                self.inline(child)
+
+    def inline_include(self, node):
+        name = node.template.var
+        if not isinstance(name, str) or node.template.filters:
+            return None
+        try:
+            included = self.engine.get_template(name)
+        except TemplateDoesNotExist:
+            return None
+        if included.nodelist.get_nodes_by_type((ExtendsNode, BlockNode)):
+            return None
+        return InlinedIncludeNode(node, included)
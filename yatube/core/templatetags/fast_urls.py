@@ -0,0 +1,11 @@
+from django import template
+
+from core.fast_urls import fast_url as reverse_fast
+
+register = template.Library()
+
+
+@register.simple_tag
+def fast_url(viewname, value):
+    """{% url viewname value %} для URL с одним аргументом, но быстрее."""
+    return reverse_fast(viewname, value)
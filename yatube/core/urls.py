@@ -1 +1,9 @@
+from django.urls import path
+
+from . import views
+
 app_name = 'core'
+
+urlpatterns = [
+    path('metrics/', views.metrics_export, name='metrics'),
+]
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
 
 
 def page_not_found(request, exception):
@@ -15,3 +20,28 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def metrics_allowed(request):
+    """Доступ к метрикам: персонал, токен или адрес из списка.
+
+    За обратным прокси REMOTE_ADDR — адрес прокси, одинаковый для всех
+    клиентов, поэтому там нужен METRICS_TOKEN, а не METRICS_ALLOWED_IPS.
+    """
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and constant_time_compare(header, f'Bearer {token}'):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_export(request):
+    allowed = metrics_allowed(request)
+    if not settings.METRICS_ENABLED or not allowed:
+        raise Http404
+    return HttpResponse(
+        metrics.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
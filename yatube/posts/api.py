@@ -0,0 +1,250 @@
+"""JSON API только для чтения, повторяющее ленты posts.views.
+
+Ленты листаются тем же CursorPaginator, что и HTML. Параметр ?fields=
+выбирает поля поста, и из базы читаются только нужные для них колонки.
+Ответы сериализуются компактно, помечаются ETag (повторный запрос
+с If-None-Match получает 304) и сжимаются gzip.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from core import dataloader
+from . import search, timeline
+from .counters import get_author_stats
+from .models import Group, Post, User
+from .utils import POSTS_ON_PAGE, CursorPaginator, get_comments_page
+
+MAX_LIMIT: int = 100
+
+# Поле ответа: (колонки для only(), функция получения значения).
+POST_FIELDS = {
+    'id': ((), lambda post: post.pk),
+    'text': (('text',), lambda post: post.text),
+    'pub_date': ((), lambda post: post.pub_date),
+    'updated': (('updated',), lambda post: post.updated),
+    'author': (('author__username',), lambda post: post.author.username),
+    'group': (
+        ('group__slug',),
+        lambda post: post.group.slug if post.group_id else None,
+    ),
+    'image': (
+        ('image',),
+        lambda post: post.image.url if post.image else None,
+    ),
+    'thumbnail': (
+        ('thumbnail', 'thumbnail_width', 'thumbnail_height'),
+        lambda post: {
+            'url': post.thumbnail_url,
+            'width': post.thumbnail_width,
+            'height': post.thumbnail_height,
+        } if post.thumbnail else None,
+    ),
+    'comments_count': (('comments_count',), lambda post: post.comments_count),
+}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def json_response(request, data, status=200):
+    """Компактный JSON с ETag; при совпадении If-None-Match — 304."""
+    content = json.dumps(
+        data,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+    etag = quote_etag(hashlib.md5(content).hexdigest())
+    if status == 200:
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
+    response = HttpResponse(
+        content, content_type='application/json', status=status
+    )
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def error_response(request, message, status):
+    return json_response(request, {'error': message}, status=status)
+
+
+def get_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(POST_FIELDS)
+    fields = list(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()
+    ))
+    unknown = [name for name in fields if name not in POST_FIELDS]
+    if unknown or not fields:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def select_fields(queryset, fields):
+    """Сужает запрос до колонок, нужных выбранным полям."""
+    columns = {'pub_date'}
+    for name in fields:
+        columns.update(POST_FIELDS[name][0])
+    related = {column.split('__')[0] for column in columns if '__' in column}
+    return queryset.select_related(None).select_related(*related).only(
+        *columns
+    )
+
+
+def serialize_post(post, fields):
+    return {name: POST_FIELDS[name][1](post) for name in fields}
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', POSTS_ON_PAGE))
+    except ValueError:
+        return POSTS_ON_PAGE
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def feed_data(request, queryset):
+    fields = get_fields(request)
+    paginator = CursorPaginator(
+        select_fields(queryset, fields), get_limit(request)
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return {
+        'results': [serialize_post(post, fields) for post in page_obj],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    }
+
+
+def comments_data(page_obj):
+    return {
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'pub_date': comment.pub_date,
+            }
+            for comment in page_obj
+        ],
+        'comments_next_cursor': page_obj.next_cursor,
+    }
+
+
+def api_view(view):
+    """Общая обвязка: только GET/HEAD, gzip, ошибки полей как 400."""
+    @require_safe
+    @gzip_page
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except FieldsError as error:
+            return error_response(request, str(error), 400)
+    return wrapper
+
+
+@api_view
+def index(request):
+    return json_response(request, feed_data(request, Post.objects.all()))
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    data = {
+        'group': {
+            'title': group.title,
+            'slug': group.slug,
+            'description': group.description,
+        },
+        **feed_data(request, group.posts_in_group.all()),
+    }
+    return json_response(request, data)
+
+
+@api_view
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    stats = get_author_stats(author)
+    data = {
+        'author': {
+            'username': author.username,
+            'full_name': author.get_full_name(),
+            'posts_count': stats.posts_count,
+            'followers_count': stats.followers_count,
+            'following_count': stats.following_count,
+        },
+        **feed_data(request, author.posts.all()),
+    }
+    return json_response(request, data)
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = get_fields(request)
+    post = get_object_or_404(
+        select_fields(Post.objects.all(), fields), pk=post_id
+    )
+    data = {
+        **serialize_post(post, fields),
+        **comments_data(get_comments_page(post)),
+    }
+    return json_response(request, data)
+
+
+@api_view
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    page_obj = get_comments_page(post, request.GET.get('cursor'))
+    return json_response(request, comments_data(page_obj))
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error_response(request, 'Нужна авторизация', 401)
+    posts = timeline.feed_for(request.user)
+    return json_response(request, feed_data(request, posts))
+
+
+@api_view
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    results = search.search(
+        query, request.GET.get('cursor'),
+        data=dataloader.for_request(request),
+    )
+    data = {
+        'query': query,
+        'results': [
+            {
+                'kind': hit.kind,
+                'id': hit.obj.pk,
+                'url': hit.url,
+                'text': hit.text,
+                'score': hit.score,
+            }
+            for hit in results.hits
+        ],
+        'next_cursor': results.next_cursor,
+    }
+    return json_response(request, data)
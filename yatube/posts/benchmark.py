@@ -0,0 +1,220 @@
+"""Синтетические данные и замеры страниц posts для команды bench_posts.
+
+Данные похожи на живые: тексты из Faker, число подписчиков распределено
+по степенному закону (немного популярных авторов и длинный хвост),
+часть постов с картинками. Каждый адрес из posts.urls, кроме меняющих
+данные (WRITE_ROUTES), запрашивается тестовым клиентом: после прогрева
+снимаются задержки, число SQL-запросов и пик памяти Python (tracemalloc).
+"""
+import random
+import tracemalloc
+from datetime import timedelta
+from io import BytesIO
+from statistics import mean
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from core.benchmarks import percentiles, timer
+from . import counters, search, timeline, transfer
+from . import urls as posts_urls
+from .models import Comment, Follow, Group, Post, User
+
+IMAGES: int = 5
+
+
+def make_image(seed, width=960, height=640):
+    content = BytesIO()
+    Image.effect_noise((width, height), 32 + seed).convert('RGB').save(
+        content, 'JPEG', quality=85
+    )
+    return content.getvalue()
+
+
+def _bulk_create(model, objects):
+    for batch in transfer.batched(objects, transfer.BATCH_SIZE):
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _follows(rng, user_ids, weights, max_following):
+    for user_id in user_ids:
+        following = min(int(rng.paretovariate(1.2)), max_following)
+        authors = set(rng.choices(user_ids, weights, k=following))
+        for author_id in authors - {user_id}:
+            yield Follow(user_id=user_id, author_id=author_id)
+
+
+def generate(users=200, posts=2000, comments=5000, groups=10,
+             image_ratio=0.2, exponent=1.2, max_following=100, seed=0):
+    """Заполняет базу и пересобирает счётчики, ленты и поиск."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    now = timezone.now()
+    _bulk_create(User, (
+        User(
+            username=f'bench{number}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password='!',
+        )
+        for number in range(users)
+    ))
+    _bulk_create(Group, (
+        Group(
+            title=fake.sentence(nb_words=3)[:200],
+            slug=f'bench-{number}',
+            description=fake.paragraph(),
+        )
+        for number in range(groups)
+    ))
+    user_ids = list(User.objects.filter(
+        username__startswith='bench'
+    ).values_list('pk', flat=True))
+    rng.shuffle(user_ids)
+    # Вес автора убывает со степенью его места: закон Ципфа.
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(user_ids))]
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-'
+    ).values_list('pk', flat=True))
+    images = [
+        default_storage.save(
+            f'posts/bench_{number}.jpg', ContentFile(make_image(number))
+        )
+        for number in range(IMAGES if image_ratio else 0)
+    ]
+
+    def make_posts():
+        for _ in range(posts):
+            pub_date = now - timedelta(minutes=rng.randint(0, 525600))
+            yield Post(
+                author_id=rng.choices(user_ids, weights)[0],
+                group_id=(
+                    rng.choice(group_ids)
+                    if group_ids and rng.random() < 0.7 else None
+                ),
+                text=fake.paragraph(nb_sentences=rng.randint(1, 8)),
+                pub_date=pub_date,
+                updated=pub_date,
+                image=(
+                    rng.choice(images)
+                    if images and rng.random() < image_ratio else ''
+                ),
+            )
+
+    with transfer.keep_dates():
+        _bulk_create(Post, make_posts())
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        _bulk_create(Comment, (
+            Comment(
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=fake.sentence(),
+                pub_date=now - timedelta(minutes=rng.randint(0, 525600)),
+            )
+            for _ in range(comments if post_ids else 0)
+        ))
+    _bulk_create(Follow, _follows(rng, user_ids, weights, max_following))
+    counters.rebuild()
+    if timeline.is_materialized():
+        timeline.rebuild()
+    search.rebuild()
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+# Маршруты, которые по GET меняют данные и отвечают редиректом: их
+# замер менял бы подписки посреди прогона и мерил бы не страницы.
+WRITE_ROUTES = frozenset(('add_comment', 'profile_follow', 'profile_unfollow'))
+
+
+def url_targets(user):
+    """Адрес каждого читающего маршрута posts.urls с параметрами из данных.
+
+    Форма редактирования замеряется, только если у user есть свой пост,
+    иначе вью отвечает редиректом.
+    """
+    own_post = user.posts.first()
+    post = own_post or Post.objects.first()
+    author = User.objects.annotate(
+        followers_total=Count('following')
+    ).order_by('-followers_total').first()
+    group = Group.objects.annotate(
+        posts_total=Count('posts_in_group')
+    ).order_by('-posts_total').first()
+    values = {
+        'slug': group.slug,
+        'username': author.username,
+        'post_id': post.pk,
+    }
+    query = '?' + urlencode({'q': post.text.split()[0].strip('.,!?')})
+    query_strings = {'search': query, 'search_api': query}
+    targets = {}
+    for pattern in posts_urls.urlpatterns:
+        if pattern.name in WRITE_ROUTES:
+            continue
+        if pattern.name == 'post_edit' and own_post is None:
+            continue
+        kwargs = {name: values[name] for name in pattern.pattern.converters}
+        url = reverse(f'posts:{pattern.name}', kwargs=kwargs)
+        targets[pattern.name] = url + query_strings.get(pattern.name, '')
+    pages = Post.objects.count() // 10
+    if pages > 1:
+        targets['main:deep'] = reverse('posts:main') + f'?page={pages // 2}'
+    return targets
+
+
+def measure(client, url, repeat):
+    client.get(url)
+    samples = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            with timer() as elapsed:
+                response = client.get(url)
+        samples.append(elapsed['seconds'] * 1000)
+        queries = max(queries, len(captured))
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'url': url,
+        'status': response.status_code,
+        'queries': queries,
+        'mean_ms': round(mean(samples), 3),
+        'peak_kb': peak // 1024,
+    }
+    for name, value in percentiles(samples).items():
+        result[f'{name}_ms'] = round(value, 3)
+    return result
+
+
+def run(repeat=20, user=None):
+    """Замеры всех адресов posts от имени самого подписанного автора."""
+    if user is None:
+        user = User.objects.filter(posts__isnull=False).annotate(
+            following_total=Count('follower', distinct=True)
+        ).order_by('-following_total').first()
+    client = Client()
+    client.force_login(user)
+    cache.clear()
+    return {
+        name: measure(client, url, repeat)
+        for name, url in url_targets(user).items()
+    }
@@ -0,0 +1,122 @@
+"""Кэш отрендеренных карточек постов (includes/posts.html).
+
+Ключ карточки версионируется: id и время изменения поста, число
+комментариев и версии автора и группы. Изменение автора или группы
+увеличивает их версию, и старые карточки просто перестают читаться.
+
+Лента помечает посты страницы через prefetch_cards(): первая карточка
+читает версии всех постов одним get_many и сами карточки — вторым,
+а не по два обращения к кэшу на каждую.
+"""
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core import metrics
+
+CARD_TEMPLATE: str = 'includes/posts.html'
+# Движки шаблонов, чьи карточки кэшируются отдельно (None — Django).
+CARD_ENGINES = (None, 'jinja2')
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = Lock()
+
+
+def version_key(kind, pk):
+    return f'post_card:{kind}:{pk}'
+
+
+def bump_version(kind, pk):
+    key = version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def card_keys(posts, using=None):
+    """Ключи карточек {pk: ключ}; версии читаются одним get_many."""
+    versions = cache.get_many({
+        version_key(kind, pk)
+        for post in posts
+        for kind, pk in (('author', post.author_id), ('group', post.group_id))
+    })
+    keys = {}
+    for post in posts:
+        key = ':'.join(str(part) for part in (
+            'post_card',
+            post.pk,
+            post.updated.timestamp(),
+            post.comments_count,
+            versions.get(version_key('author', post.author_id), 0),
+            versions.get(version_key('group', post.group_id), 0),
+        ))
+        keys[post.pk] = key if using is None else f'{key}:{using}'
+    return keys
+
+
+def card_key(post):
+    return card_keys([post])[post.pk]
+
+
+class CardBatch:
+    """Карточки постов одной страницы, прочитанные из кэша вместе."""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.cards = {}
+
+    def lookup(self, post, using):
+        """(ключ, html или None) карточки поста."""
+        if using not in self.cards:
+            keys = card_keys(self.posts, using)
+            found = cache.get_many(keys.values())
+            self.cards[using] = {
+                pk: (key, found.get(key)) for pk, key in keys.items()
+            }
+        return self.cards[using][post.pk]
+
+
+def prefetch_cards(posts):
+    """Помечает посты страницы, чтобы их карточки читались пачкой."""
+    posts = list(posts)
+    batch = CardBatch(posts)
+    for post in posts:
+        post.card_batch = batch
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def render_card(post, using=None):
+    batch = getattr(post, 'card_batch', None) or CardBatch([post])
+    key, html = batch.lookup(post, using)
+    metrics.record_cache(html is not None)
+    if html is not None:
+        _count('hits')
+        return html
+    _count('misses')
+    html = render_to_string(CARD_TEMPLATE, {'post': post}, using=using)
+    cache.set(key, html, settings.POST_CARD_CACHE_TIMEOUT)
+    return html
+
+
+def forget_card(post):
+    key = card_key(post)
+    cache.delete_many([
+        key if using is None else f'{key}:{using}' for using in CARD_ENGINES
+    ])
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
@@ -0,0 +1,262 @@
+"""Отложенная запись комментариев (COMMENT_INGESTION = 'queue').
+
+add_comment дописывает проверенный комментарий строкой NDJSON в файл
+очереди (под flock, с fsync) и сразу отвечает. Фоновый поток процесса
+или команда drain_comments забирает файл целиком и сохраняет его
+пачками bulk_create: дата, счётчики, поиск и кэш страниц обновляются
+один раз на пачку. Автор сразу видит свои комментарии: они лежат
+в кэше, пока отметка «сохранено до» для поста не станет новее их.
+
+Каждая пачка сохраняется своей транзакцией, после чего позиция в файле
+записывается рядом (*.offset), так что после ошибки в середине файла
+уже сохранённые пачки не повторяются. Доставка «хотя бы один раз»: если
+процесс упадёт между коммитом пачки и записью позиции, повторится
+только эта пачка.
+"""
+import fcntl
+import glob
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock, Thread
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from core import page_cache
+from . import counters, search
+from .models import Comment, Post, User
+from .transfer import batched
+
+SYNC: str = 'sync'
+QUEUE: str = 'queue'
+SPOOL_NAME: str = 'comments.ndjson'
+
+logger = logging.getLogger(__name__)
+
+_worker = None
+_worker_lock = Lock()
+
+
+def is_queued():
+    return settings.COMMENT_INGESTION == QUEUE
+
+
+def _path(name):
+    return os.path.join(settings.COMMENT_QUEUE_DIR, name)
+
+
+@contextmanager
+def _locked(name, blocking=True):
+    os.makedirs(settings.COMMENT_QUEUE_DIR, exist_ok=True)
+    with open(_path(name), 'a') as lock:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def pending_key(post_id, author_id):
+    return f'comment_queue:pending:{post_id}:{author_id}'
+
+
+def committed_key(post_id):
+    return f'comment_queue:committed:{post_id}'
+
+
+def enqueue(post_id, author, text):
+    """Ставит комментарий в очередь и запоминает его для автора."""
+    with _locked('queue.lock'):
+        entry = {
+            'post': post_id,
+            'author': author.pk,
+            'text': text,
+            'queued': time.time(),
+        }
+        with open(_path(SPOOL_NAME), 'a', encoding='utf-8') as spool:
+            spool.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            spool.flush()
+            if settings.COMMENT_QUEUE_FSYNC:
+                os.fsync(spool.fileno())
+    key = pending_key(post_id, author.pk)
+    committed = cache.get(committed_key(post_id), 0)
+    entries = [
+        pending for pending in cache.get(key, [])
+        if pending['queued'] > committed
+    ]
+    entries.append(entry)
+    cache.set(key, entries, settings.COMMENT_QUEUE_PENDING_TIMEOUT)
+    ensure_worker()
+    return entry
+
+
+def queued_at(entry):
+    return datetime.fromtimestamp(entry['queued'], timezone.utc)
+
+
+def pending_comments(post, user):
+    """Ещё не сохранённые комментарии user к post, новые первыми."""
+    if not user.is_authenticated:
+        return []
+    values = cache.get_many((
+        pending_key(post.pk, user.pk), committed_key(post.pk)
+    ))
+    committed = values.get(committed_key(post.pk), 0)
+    return [
+        Comment(
+            post_id=post.pk,
+            author=user,
+            text=entry['text'],
+            pub_date=queued_at(entry),
+        )
+        for entry in reversed(values.get(pending_key(post.pk, user.pk), []))
+        if entry['queued'] > committed
+    ]
+
+
+def read_entries(path, offset=0):
+    """Записи файла очереди с позицией конца каждой строки."""
+    with open(path, 'rb') as source:
+        source.seek(offset)
+        for line in source:
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield offset, json.loads(line)
+            except ValueError:
+                logger.error('Пропущена битая строка очереди: %r', line)
+
+
+def read_offset(path):
+    try:
+        with open(path + '.offset') as source:
+            return int(source.read())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def write_offset(path, offset):
+    with open(path + '.offset.tmp', 'w') as target:
+        target.write(str(offset))
+        target.flush()
+        if settings.COMMENT_QUEUE_FSYNC:
+            os.fsync(target.fileno())
+    os.replace(path + '.offset.tmp', path + '.offset')
+
+
+def set_inserted_ids(comments):
+    """Проставляет id, если база не вернула их из bulk_create.
+
+    Вызывается в транзакции после вставки: SQLite держит блокировку
+    записи до коммита, так что вставленные строки — последние по id.
+    """
+    if not comments or comments[0].pk is not None:
+        return
+    ids = Comment.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    )[:len(comments)]
+    for comment, pk in zip(comments, reversed(list(ids))):
+        comment.pk = pk
+
+
+def commit_batch(batch):
+    """Сохраняет пачку одной транзакцией; возвращает число комментариев."""
+    with transaction.atomic():
+        posts = set(Post.objects.filter(
+            pk__in={entry['post'] for entry in batch}
+        ).values_list('pk', flat=True))
+        authors = set(User.objects.filter(
+            pk__in={entry['author'] for entry in batch}
+        ).values_list('pk', flat=True))
+        batch = [
+            entry for entry in batch
+            if entry['post'] in posts and entry['author'] in authors
+        ]
+        comments = Comment.objects.bulk_create([
+            Comment(
+                post_id=entry['post'],
+                author_id=entry['author'],
+                text=entry['text'],
+            )
+            for entry in batch
+        ])
+        set_inserted_ids(comments)
+        # bulk_create ставит дату сохранения (auto_now_add), а автор уже
+        # видел время постановки в очередь.
+        for comment, entry in zip(comments, batch):
+            comment.pub_date = queued_at(entry)
+        Comment.objects.bulk_update(comments, ['pub_date'])
+        per_post = Counter(entry['post'] for entry in batch)
+        for post_id, added in per_post.items():
+            counters.change_comments_count(post_id, added)
+        search.index_objects('comment', comments)
+    committed = defaultdict(float)
+    for entry in batch:
+        committed[entry['post']] = max(
+            committed[entry['post']], entry['queued']
+        )
+    cache.set_many(
+        {committed_key(post_id): queued
+         for post_id, queued in committed.items()},
+        settings.COMMENT_QUEUE_PENDING_TIMEOUT,
+    )
+    page_cache.purge(*(f'post:{post_id}' for post_id in per_post))
+    return len(batch)
+
+
+def drain():
+    """Переносит всё накопленное в базу; возвращает число комментариев."""
+    with _locked('drain.lock', blocking=False) as acquired:
+        if not acquired:
+            return 0
+        with _locked('queue.lock'):
+            spool = _path(SPOOL_NAME)
+            if os.path.exists(spool) and os.path.getsize(spool):
+                os.rename(spool, _path(f'{time.time_ns()}.processing'))
+        saved = 0
+        for path in sorted(glob.glob(_path('*.processing'))):
+            entries = read_entries(path, read_offset(path))
+            for batch in batched(entries, settings.COMMENT_QUEUE_BATCH_SIZE):
+                saved += commit_batch([entry for _, entry in batch])
+                write_offset(path, batch[-1][0])
+            os.remove(path)
+            if os.path.exists(path + '.offset'):
+                os.remove(path + '.offset')
+        return saved
+
+
+def _run():
+    while True:
+        time.sleep(settings.COMMENT_QUEUE_INTERVAL)
+        try:
+            drain()
+        except Exception:
+            logger.exception('Не удалось сохранить очередь комментариев')
+        finally:
+            close_old_connections()
+
+
+def ensure_worker():
+    """Запускает фоновый поток сохранения, если его ещё нет."""
+    global _worker
+    if getattr(connection, 'is_in_memory_db', lambda: False)():
+        # Другие потоки не видят базу в памяти; очередь сохраняет drain().
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = Thread(target=_run, name='comment-queue', daemon=True)
+            _worker.start()
@@ -0,0 +1,147 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Число постов в общей ленте и в группах хранит FeedCounter, у автора —
+AuthorStats; их читает пагинатор вместо COUNT(*) (см. CountedPaginator).
+
+Счётчики меняются сигналами (posts/signals.py); bulk_create и прямые
+update() сигналы обходят, поэтому после массовых загрузок счётчики
+пересобираются командой rebuild_counters.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (AuthorStats, Comment, FeedCounter, Follow, Group, Post,
+                     User)
+
+BATCH_SIZE: int = 1000
+POSTS_KEY: str = 'posts'
+
+
+def count_subquery(model, field):
+    """Число строк model, ссылающихся на внешний объект через field."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def compute_author_stats(author_id):
+    return AuthorStats(
+        author_id=author_id,
+        posts_count=Post.objects.filter(author_id=author_id).count(),
+        followers_count=Follow.objects.filter(author_id=author_id).count(),
+        following_count=Follow.objects.filter(user_id=author_id).count(),
+    )
+
+
+def get_author_stats(author):
+    """Счётчики автора.
+
+    Строку создают сигнал создания пользователя, миграция и rebuild();
+    чтение её не создаёт, чтобы GET-запрос ничего не записывал и не
+    закреплял клиента за основной базой. Без строки счётчики считаются
+    запросами.
+    """
+    try:
+        return author.stats
+    except AuthorStats.DoesNotExist:
+        pass
+    stats = compute_author_stats(author.pk)
+    author.stats = stats
+    return stats
+
+
+def change_author_stats(author_id, field, delta):
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    stats.update(**{field: F(field) + delta})
+
+
+def change_comments_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def group_key(group_id):
+    return f'group:{group_id}'
+
+
+def compute_feed_count(key):
+    posts = Post.objects.all()
+    if key != POSTS_KEY:
+        posts = posts.filter(group_id=int(key.split(':', 1)[1]))
+    return posts.count()
+
+
+def get_feed_count(key):
+    """Значение счётчика ленты.
+
+    Строки создают миграция, сигнал создания группы и rebuild();
+    чтение их не создаёт, чтобы GET-запрос ничего не записывал.
+    Без строки считается COUNT(*).
+    """
+    value = FeedCounter.objects.filter(key=key).values_list(
+        'value', flat=True
+    ).first()
+    if value is None:
+        return compute_feed_count(key)
+    return value
+
+
+def change_feed_count(key, delta):
+    counters = FeedCounter.objects.filter(key=key)
+    if delta < 0:
+        counters = counters.filter(value__gte=-delta)
+    counters.update(value=F('value') + delta)
+
+
+def change_post_counts(group_id, delta, total=True):
+    """Меняет счётчики общей ленты и группы поста."""
+    if total:
+        change_feed_count(POSTS_KEY, delta)
+    if group_id:
+        change_feed_count(group_key(group_id), delta)
+
+
+def rebuild():
+    """Пересчитывает все счётчики массовыми запросами."""
+    Post.objects.update(comments_count=count_subquery(Comment, 'post'))
+    users = User.objects.annotate(
+        posts_total=count_subquery(Post, 'author'),
+        followers_total=count_subquery(Follow, 'author'),
+        following_total=count_subquery(Follow, 'user'),
+    ).values_list(
+        'pk', 'posts_total', 'followers_total', 'following_total'
+    ).order_by('pk')
+    rebuilt = 0
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        batch = []
+        for pk, posts, followers, following in users.iterator():
+            batch.append(AuthorStats(
+                author_id=pk,
+                posts_count=posts,
+                followers_count=followers,
+                following_count=following,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                AuthorStats.objects.bulk_create(batch)
+                rebuilt += len(batch)
+                batch = []
+        AuthorStats.objects.bulk_create(batch)
+        rebuilt += len(batch)
+        FeedCounter.objects.all().delete()
+        groups = Group.objects.annotate(
+            total=count_subquery(Post, 'group')
+        ).values_list('pk', 'total')
+        FeedCounter.objects.bulk_create([
+            FeedCounter(key=POSTS_KEY, value=Post.objects.count()),
+            *(FeedCounter(key=group_key(pk), value=total)
+              for pk, total in groups.iterator()),
+        ])
+    return rebuilt
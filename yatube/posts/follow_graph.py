@@ -0,0 +1,61 @@
+"""Кэш графа подписок: отсортированные id авторов каждого читателя.
+
+Список хранится в кэше упакованным массивом array('I') вместе с датой
+регистрации читателя, чтобы после удаления пользователя его id не
+подхватил чужой список. Проверка «подписан ли A на B» — двоичный поиск
+по массиву. Сигналы Follow удаляют ключ сразу и ещё раз после коммита,
+а чтение заполняет его через cache.add, поэтому устаревший список
+не перезапишет свежий.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+TYPECODE: str = 'I'
+
+
+def cache_key(user_id):
+    return f'follow_graph:{user_id}'
+
+
+def _stamp(user):
+    return user.date_joined.timestamp()
+
+
+def followee_ids(user):
+    """Отсортированный массив id авторов, на которых подписан user."""
+    key = cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == _stamp(user):
+        ids = array(TYPECODE)
+        ids.frombytes(cached[1])
+        return ids
+    ids = array(TYPECODE, sorted(
+        Follow.objects.filter(user_id=user.pk).values_list(
+            'author_id', flat=True
+        )
+    ))
+    value = (_stamp(user), ids.tobytes())
+    timeout = settings.FOLLOW_GRAPH_CACHE_TIMEOUT
+    if cached is None:
+        cache.add(key, value, timeout)
+    else:
+        cache.set(key, value, timeout)
+    return ids
+
+
+def is_following(user, author_id):
+    ids = followee_ids(user)
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def forget(*user_ids):
+    keys = [cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,5 +1,8 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
+from . import uploads
 from .models import Comment, Post
 
 
@@ -8,6 +11,39 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not hasattr(image, 'content_type'):
+            return image
+        if uploads.pixel_count(image) > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Слишком большая картинка: не больше '
+                f'{settings.POST_IMAGE_MAX_PIXELS} пикселей.'
+            )
+        return uploads.normalize(image)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        image = self.files.get('image') if self.files else None
+        if uploads.is_too_large(image):
+            # Обрезанный файл не проходит проверку картинки раньше,
+            # чем clean_image, поэтому заменяем ошибку на понятную.
+            self._errors.pop('image', None)
+            self.add_error('image', (
+                'Файл слишком большой: не больше '
+                f'{filesizeformat(settings.POST_IMAGE_MAX_BYTES)}.'
+            ))
+        return cleaned_data
+
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        if 'image' in self.changed_data:
+            post.thumbnail = ''
+            post.thumbnail_width = post.thumbnail_height = None
+        if commit:
+            post.save()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
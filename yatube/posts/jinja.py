@@ -0,0 +1,15 @@
+"""Окружение Jinja2 с карточками постов (см. core/jinja.py)."""
+from markupsafe import Markup
+
+from core.jinja import environment as core_environment
+from .cards import render_card
+
+
+def post_card(post):
+    return Markup(render_card(post, using='jinja2'))
+
+
+def environment(**options):
+    env = core_environment(**options)
+    env.globals['post_card'] = post_card
+    return env
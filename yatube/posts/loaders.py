@@ -0,0 +1,30 @@
+"""Пакетные функции для core.dataloader: ключи -> {ключ: объект}."""
+from .models import Comment, Group, Post, User
+
+
+def users_by_username(usernames):
+    users = User.objects.select_related('stats').filter(
+        username__in=usernames
+    )
+    return {user.username: user for user in users}
+
+
+def posts_by_pk(pks):
+    posts = Post.objects.select_related('author__stats', 'group').filter(
+        pk__in=pks
+    )
+    return {post.pk: post for post in posts}
+
+
+def feed_posts_by_pk(pks):
+    return Post.objects.for_feed().in_bulk(pks)
+
+
+def comments_by_pk(pks):
+    return Comment.objects.select_related('author').only(
+        'text', 'pub_date', 'post', 'author__username'
+    ).in_bulk(pks)
+
+
+def groups_by_pk(pks):
+    return Group.objects.in_bulk(pks)
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.asgi import WsgiToAsgi, build_environ, call_wsgi
+from core.benchmarks import percentiles, timer, write_results
+from posts import benchmark
+
+
+def scope_for(path):
+    parts = urlsplit(path)
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': parts.path,
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+
+
+def run_wsgi(application, paths, clients, workers, upload, download):
+    """Синхронный воркер держит поток, пока клиент шлёт и читает данные.
+
+    Все клиенты приходят сразу, поэтому задержка считается от начала
+    прогона и включает ожидание свободного потока.
+    """
+    start = time.perf_counter()
+
+    def client(number):
+        time.sleep(upload)
+        environ = build_environ(
+            scope_for(paths[number % len(paths)]), io.BytesIO()
+        )
+        status, _, _ = call_wsgi(application, environ)
+        time.sleep(download)
+        return status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(client, range(clients)))
+
+
+async def run_asgi(application, paths, clients, upload, download):
+    """ASGI: медленный ввод-вывод ждёт в цикле событий, а не в потоке."""
+    start = time.perf_counter()
+
+    async def client(number):
+        response = {}
+
+        async def receive():
+            await asyncio.sleep(upload)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif not message.get('more_body'):
+                await asyncio.sleep(download)
+
+        await application(scope_for(paths[number % len(paths)]), receive, send)
+        return response['status'], time.perf_counter() - start
+
+    return await asyncio.gather(*(client(number) for number in range(clients)))
+
+
+def summarize(responses, seconds):
+    latencies = [latency for _, latency in responses]
+    return {
+        'requests_per_s': round(len(responses) / seconds, 1),
+        'errors': sum(status != 200 for status, _ in responses),
+        **{
+            f'{point}_ms': round(value * 1000, 1)
+            for point, value in percentiles(latencies, (50, 99)).items()
+        },
+        'seconds': round(seconds, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI-воркер из --workers потоков и yatube/asgi.py '
+        'с тем же числом потоков под --clients одновременными медленными '
+        'клиентами, которые отправляют запрос за --upload секунд и читают '
+        'ответ за --download секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--upload', type=float, default=0.2)
+        parser.add_argument('--download', type=float, default=0.2)
+        parser.add_argument(
+            '--path', action='append',
+            help='Адреса по очереди; по умолчанию главная страница.',
+        )
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or ['/']
+        directory = tempfile.TemporaryDirectory()
+        setup_test_environment(debug=False)
+        # Файл, а не база в памяти: запросы идут из разных потоков.
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory.name, 'bench.sqlite3'
+        )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            benchmark.generate(
+                users=options['users'], posts=options['posts'],
+                comments=options['posts'], groups=5, image_ratio=0,
+            )
+            wsgi = get_wsgi_application()
+            results = {}
+            with timer() as elapsed:
+                responses = run_wsgi(
+                    wsgi, paths, options['clients'], options['workers'],
+                    options['upload'], options['download'],
+                )
+            results['wsgi'] = summarize(responses, elapsed['seconds'])
+            with timer() as elapsed:
+                responses = asyncio.run(run_asgi(
+                    WsgiToAsgi(wsgi, options['workers']), paths,
+                    options['clients'], options['upload'],
+                    options['download'],
+                ))
+            results['asgi'] = summarize(responses, elapsed['seconds'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            directory.cleanup()
+        for name, result in results.items():
+            self.stdout.write(
+                '{name:<5} {requests_per_s:>8} запр/с  p50 {p50_ms:>8} мс  '
+                'p99 {p99_ms:>8} мс  ошибок {errors}  за {seconds} с'.format(
+                    name=name, **result
+                )
+            )
+        if options['output']:
+            write_results(options['output'], results)
@@ -0,0 +1,99 @@
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from core.benchmarks import compare, read_results, timer, write_results
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт тестовую базу, заполняет её синтетическими данными '
+        'и замеряет задержки, число запросов и память для каждого адреса '
+        'posts. С --baseline сравнивает результат с сохранённым и '
+        'завершается ошибкой при регрессии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.2,
+            help='Доля постов с картинкой.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Замеров на адрес после прогрева.',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+        parser.add_argument('--baseline', help='Результаты для сравнения.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост задержки и памяти (доля).',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        media = tempfile.TemporaryDirectory()
+        try:
+            with override_settings(MEDIA_ROOT=media.name), timer() as elapsed:
+                scale = benchmark.generate(
+                    users=options['users'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    groups=options['groups'],
+                    image_ratio=options['image_ratio'],
+                    seed=options['seed'],
+                )
+            self.stdout.write(
+                'Данные: {} за {:.1f} с'.format(
+                    ', '.join(f'{key} {value}' for key, value in
+                              scale.items()),
+                    elapsed['seconds'],
+                )
+            )
+            with override_settings(MEDIA_ROOT=media.name):
+                results = benchmark.run(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            media.cleanup()
+        for name, result in results.items():
+            self.stdout.write(
+                '{name:<18} {status} p50 {p50_ms:>8} ms  p90 {p90_ms:>8} ms  '
+                'p99 {p99_ms:>8} ms  {queries:>3} SQL  {peak_kb:>6} KB'.format(
+                    name=name, **result
+                )
+            )
+        if options['output']:
+            write_results(options['output'], {
+                'meta': {
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'scale': scale,
+                    'repeat': options['repeat'],
+                    'cursor_pagination': settings.POSTS_CURSOR_PAGINATION,
+                    'follow_feed': settings.POSTS_FOLLOW_FEED,
+                    'page_cache': settings.PAGE_CACHE_ENABLED,
+                },
+                'results': results,
+            })
+        if options['baseline']:
+            baseline = read_results(options['baseline'])['results']
+            regressions = compare(results, baseline, options['tolerance'])
+            for name, metric, before, after in regressions:
+                self.stderr.write(f'{name}: {metric} {before} -> {after}')
+            if regressions:
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,130 @@
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.shortcuts import render
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from core.benchmarks import percentiles, write_results
+from core.fast_urls import fast_url
+from posts.models import Group, Post, User
+
+FILE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+LOADERS = {
+    'stock': FILE_LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', FILE_LOADERS)],
+    'inlined': [('core.template_loaders.Loader', FILE_LOADERS)],
+}
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def make_page(size):
+    """Страница группы из size несохранённых постов: база не нужна."""
+    group = Group(pk=1, title='Группа', slug='group', description='Группа')
+    now = timezone.now()
+    posts = [
+        Post(
+            pk=number,
+            author=User(
+                pk=number, username=f'author{number}',
+                first_name='Имя', last_name=f'Фамилия{number}',
+            ),
+            group=group,
+            text='Текст поста ' * 20,
+            pub_date=now,
+            updated=now,
+            comments_count=number,
+        )
+        for number in range(1, size + 1)
+    ]
+    return group, Paginator(posts, size).page(1)
+
+
+def templates_with(loaders):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+def measure_page(request, context, repeat, using=None):
+    render(request, 'posts/group_list.html', context, using=using)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(request, 'posts/group_list.html', context, using=using)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure_calls(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+class Command(BaseCommand):
+    help = (
+        'Рендерит страницу группы из --size постов с разными загрузчиками '
+        'шаблонов Django и, если установлен, на Jinja2 (без кэша '
+        'карточек) и печатает время страницы и цену одного поста, а также '
+        'сравнивает reverse() с fast_url.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        group, page_obj = make_page(options['size'])
+        path = reverse('posts:group_posts', args=[group.slug])
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(path)
+        context = {'group': group, 'page_obj': page_obj}
+        variants = [
+            (name, {'TEMPLATES': templates_with(loaders)}, None)
+            for name, loaders in LOADERS.items()
+        ]
+        if 'jinja2' in (engine.name for engine in engines.all()):
+            variants.append(('jinja2', {}, 'jinja2'))
+        results = {}
+        for name, overrides, using in variants:
+            with override_settings(CACHES=DUMMY_CACHE, **overrides):
+                samples = measure_page(
+                    request, context, options['repeat'], using
+                )
+            p50 = percentiles(samples, (50,))['p50']
+            results[name] = {
+                'page_ms': round(p50 * 1000, 3),
+                'per_post_us': round(p50 / options['size'] * 1e6, 1),
+            }
+            self.stdout.write(
+                f'{name:8} страница {results[name]["page_ms"]:>8} мс  '
+                f'пост {results[name]["per_post_us"]:>8} мкс'
+            )
+        for name, function in (
+            ('reverse', lambda: reverse('posts:profile', args=['author'])),
+            ('fast_url', lambda: fast_url('posts:profile', 'author')),
+        ):
+            seconds = measure_calls(function, options['repeat'] * 50)
+            results[name] = {'call_us': round(seconds * 1e6, 2)}
+            self.stdout.write(
+                f'{name:8} вызов {results[name]["call_us"]:>8} мкс'
+            )
+        if options['output']:
+            write_results(options['output'], results)
@@ -0,0 +1,72 @@
+import tracemalloc
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from PIL import Image
+
+from core.benchmarks import peak_rss_kb, timer, write_results
+from posts.forms import PostForm
+
+
+def make_jpeg(width, height):
+    exif = Image.Exif()
+    exif[0x010f] = 'Yatube benchmark'
+    content = BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(
+        content, 'JPEG', quality=90, exif=exif
+    )
+    return content.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет загрузку картинок через обработчик загрузки и PostForm '
+        'и печатает время и пиковую память на каждую загрузку. '
+        'tracemalloc видит только память Python, поэтому рядом выводится '
+        'прирост пикового RSS, куда попадают буферы Pillow.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1024x768,3000x2000,6000x4000',
+            help='Размеры картинок через запятую.',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        results = []
+        for size in options['sizes'].split(','):
+            width, height = (int(side) for side in size.split('x'))
+            content = make_jpeg(width, height)
+            for attempt in range(options['repeat']):
+                request = factory.post('/create/', {
+                    'text': 'Бенчмарк',
+                    'image': SimpleUploadedFile('bench.jpg', content),
+                })
+                rss_before = peak_rss_kb()
+                tracemalloc.start()
+                with timer() as elapsed:
+                    form = PostForm(request.POST, files=request.FILES)
+                    valid = form.is_valid()
+                _, python_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                result = {
+                    'size': size,
+                    'bytes': len(content),
+                    'valid': valid,
+                    'seconds': round(elapsed['seconds'], 4),
+                    'python_peak_kb': python_peak // 1024,
+                    'rss_growth_kb': peak_rss_kb() - rss_before,
+                }
+                results.append(result)
+                self.stdout.write(
+                    '{size:>10} {bytes:>10} B  {seconds:>7} s  '
+                    'python peak {python_peak_kb} KB  '
+                    'rss +{rss_growth_kb} KB'.format(**result)
+                )
+        if options['output']:
+            write_results(options['output'], results)
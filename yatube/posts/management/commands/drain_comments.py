@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import comment_queue
+
+
+class Command(BaseCommand):
+    help = 'Сохраняет в базу комментарии из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а проверять очередь раз в --interval.',
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+
+    def handle(self, *args, loop=False, interval=1.0, **options):
+        while True:
+            saved = comment_queue.drain()
+            if saved or not loop:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Сохранено комментариев: {saved}'
+                ))
+            if not loop:
+                return
+            time.sleep(interval)
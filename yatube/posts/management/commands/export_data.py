@@ -0,0 +1,42 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии или подписки построчно.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(transfer.FIELDS))
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл выгрузки; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        rows = transfer.export_rows(kind)
+        started = time.perf_counter()
+        if options['output'] == '-':
+            written = transfer.write_rows(
+                rows, sys.stdout, options['format'], transfer.FIELDS[kind]
+            )
+        else:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as stream:
+                written = transfer.write_rows(
+                    rows, stream, options['format'], transfer.FIELDS[kind]
+                )
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено строк: {written} '
+            f'({written / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
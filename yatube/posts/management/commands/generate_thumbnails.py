@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate_many
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры для уже загруженных картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Постов на одно задание процесса.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить и уже готовые миниатюры.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(thumbnail='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        size = options['chunk_size']
+        chunks = [
+            post_ids[start:start + size]
+            for start in range(0, len(post_ids), size)
+        ]
+        # Дочерние процессы не должны делить соединение с родителем.
+        connections.close_all()
+        if options['workers'] > 1:
+            with ProcessPoolExecutor(options['workers']) as pool:
+                done = sum(pool.map(generate_many, chunks))
+        else:
+            done = sum(map(generate_many, chunks))
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры построены: {done} из {len(post_ids)}'
+        ))
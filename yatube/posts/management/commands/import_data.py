@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import counters, search, timeline, transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает группы, посты, комментарии или подписки пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(transfer.FIELDS))
+        parser.add_argument('path', help='Файл NDJSON или CSV; - для stdin.')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS,
+            help='Формат; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE,
+            help='Строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересобирать счётчики, ленты и поиск после загрузки.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or (
+            'csv' if os.path.splitext(path)[1].lower() == '.csv'
+            else 'ndjson'
+        )
+        started = time.perf_counter()
+        try:
+            if path == '-':
+                inserted = self.load(sys.stdin, data_format, options)
+            else:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    inserted = self.load(stream, data_format, options)
+        except transfer.TransferError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено строк: {inserted} '
+            f'({inserted / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
+        if not options['skip_rebuild']:
+            self.rebuild()
+
+    def load(self, stream, data_format, options):
+        return transfer.import_rows(
+            options['kind'],
+            transfer.read_rows(stream, data_format),
+            options['batch_size'],
+        )
+
+    def rebuild(self):
+        counters.rebuild()
+        if timeline.is_materialized():
+            timeline.rebuild()
+        search.rebuild()
+        self.stdout.write('Счётчики, ленты и поиск пересобраны.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'user_ids', nargs='*', type=int,
+            help='id пользователей; по умолчанию все.',
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = timeline.rebuild(options['user_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Режим {timeline.get_mode()}: восстановлено подписок {rebuilt}'
+        ))
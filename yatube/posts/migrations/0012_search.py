@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:08
+
+from django.db import DatabaseError, migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    """Таблица FTS5 для posts/search.py; без FTS5 работает SearchTerm."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE posts_search USING fts5("
+            "body, tokenize = 'unicode61 remove_diacritics 0')"
+        )
+    except DatabaseError:
+        pass
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('document', models.BigIntegerField(verbose_name='Документ')),
+                ('frequency', models.PositiveIntegerField(default=1, verbose_name='Частота')),
+            ],
+            options={
+                'verbose_name': 'Слово индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['document'], name='search_document_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'document'), name='unique_search_term'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_feed_counters(apps, schema_editor):
+    FeedCounter = apps.get_model('posts', 'FeedCounter')
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    groups = dict(Post.objects.filter(group__isnull=False).order_by().values(
+        'group'
+    ).annotate(total=Count('pk')).values_list('group', 'total'))
+    FeedCounter.objects.bulk_create([
+        FeedCounter(key='posts', value=Post.objects.count()),
+        *(FeedCounter(key=f'group:{pk}', value=groups.get(pk, 0))
+          for pk in Group.objects.values_list('pk', flat=True)),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCounter',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('value', models.PositiveIntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик ленты',
+                'verbose_name_plural': 'Счётчики лент',
+            },
+        ),
+        migrations.RunPython(fill_feed_counters, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
 
 User = get_user_model()
@@ -17,11 +18,37 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    FEED_FIELDS = (
+        'text',
+        'pub_date',
+        'updated',
+        'image',
+        'thumbnail',
+        'thumbnail_width',
+        'thumbnail_height',
+        'comments_count',
+        'author__username',
+        'author__first_name',
+        'author__last_name',
+        'group__title',
+        'group__slug',
+    )
+
+    def for_feed(self):
+        """Посты со всеми данными, которые нужны карточке в ленте."""
+        return self.select_related('author', 'group').only(
+            *self.FEED_FIELDS
+        )
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста',
                             help_text='Введите текст поста')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -43,15 +70,54 @@ class Post(models.Model):
         blank=True,
         null=True,
     )
+    thumbnail = models.CharField(
+        'Миниатюра',
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Запись'
         verbose_name_plural = 'Записи'
+        indexes = (
+            models.Index(fields=('-pub_date',), name='post_pub_date_idx'),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_group_pub_date_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @property
+    def thumbnail_url(self):
+        return default_storage.url(self.thumbnail) if self.thumbnail else ''
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='Текст коммента',
@@ -76,6 +142,12 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Коммент'
         verbose_name_plural = 'Комменты'
+        indexes = (
+            models.Index(
+                fields=('post', '-pub_date'),
+                name='comment_post_pub_date_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -98,6 +170,106 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
 
     def __str__(self) -> str:
         return (f'{self.user.username} подписан на {self.author.username}')
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self) -> str:
+        return f'Статистика {self.author.username}'
+
+
+class FeedCounter(models.Model):
+    """Число постов в ленте: 'posts' — всего, 'group:<id>' — в группе."""
+
+    key = models.CharField('Ключ', max_length=64, primary_key=True)
+    value = models.PositiveIntegerField('Значение', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик ленты'
+        verbose_name_plural = 'Счётчики лент'
+
+    def __str__(self) -> str:
+        return f'{self.key}: {self.value}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Запись'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date'),
+                name='timeline_user_pub_date_idx',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user.username}: {self.post}'
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса для поиска без FTS5 (см. posts/search.py)."""
+
+    term = models.CharField('Основа слова', max_length=64)
+    document = models.BigIntegerField('Документ')
+    frequency = models.PositiveIntegerField('Частота', default=1)
+
+    class Meta:
+        verbose_name = 'Слово индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'document'),
+                name='unique_search_term',
+            ),
+        )
+        indexes = (
+            models.Index(fields=('document',), name='search_document_idx'),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.term}: {self.document}'
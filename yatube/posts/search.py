@@ -0,0 +1,309 @@
+"""Полнотекстовый поиск по постам, комментариям и группам.
+
+Текст разбивается на слова, русские слова сводятся к основам
+(posts/stemmer.py) и при индексации, и при поиске. На SQLite основы
+лежат в таблице FTS5 posts_search и ранжируются bm25; без FTS5 тот же
+индекс ведётся в SearchTerm и ранжируется по tf-idf прямо в SQL, а число
+документов для idf берётся из кэша. Индекс обновляется
+сигналами и пересобирается командой rebuild_search_index. Выдача
+листается по ключу (score, rowid), а не OFFSET.
+"""
+import base64
+import math
+import re
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import (Case, Count, F, FloatField, Q, Sum, Value,
+                              When)
+from django.db.models.functions import Ln
+from django.urls import reverse
+
+from core import dataloader
+from . import loaders
+from .models import Comment, Group, Post, SearchTerm
+from .stemmer import stem
+
+KINDS = ('post', 'comment', 'group')
+FTS_TABLE: str = 'posts_search'
+BATCH_SIZE: int = 1000
+MAX_QUERY_TERMS: int = 10
+RESULTS_ON_PAGE: int = 10
+DOCUMENTS_CACHE_KEY: str = 'search:documents'
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+
+SearchHit = namedtuple('SearchHit', 'kind obj url text score')
+SearchResults = namedtuple('SearchResults', 'hits next_cursor')
+
+
+def tokenize(text):
+    """Основы слов текста в порядке появления."""
+    words = WORD_RE.findall(text.lower().replace('ё', 'е'))
+    return [
+        (stem(word) if CYRILLIC_RE.search(word) else word)[:64]
+        for word in words
+    ]
+
+
+def document_id(kind, pk):
+    """rowid документа: один индекс на все виды объектов."""
+    return pk * len(KINDS) + KINDS.index(kind)
+
+
+def split_document_id(document):
+    return KINDS[document % len(KINDS)], document // len(KINDS)
+
+
+def document_text(kind, obj):
+    if kind == 'group':
+        return f'{obj.title} {obj.description}'
+    return obj.text
+
+
+class FtsBackend:
+    """Индекс в виртуальной таблице FTS5, ранжирование bm25."""
+
+    def index(self, document, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [document, ' '.join(terms)],
+            )
+
+    def bulk_index(self, documents):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [(document, ' '.join(terms)) for document, terms in documents],
+            )
+
+    def remove(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, terms, after, limit):
+        match = ' '.join(f'"{term}"' for term in terms)
+        sql = (
+            f'SELECT score, rowid FROM (SELECT rowid, bm25({FTS_TABLE}) '
+            f'AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+        )
+        params = [match]
+        if after is not None:
+            sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY score, rowid LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit])
+            return cursor.fetchall()
+
+
+class TableBackend:
+    """Обратный индекс в SearchTerm для баз без FTS5, ранжирование tf-idf."""
+
+    def index(self, document, terms):
+        self.remove(document)
+        self.bulk_index([(document, terms)])
+
+    def bulk_index(self, documents):
+        SearchTerm.objects.bulk_create(
+            [
+                SearchTerm(term=term, document=document, frequency=frequency)
+                for document, terms in documents
+                for term, frequency in Counter(terms).items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    def remove(self, document):
+        SearchTerm.objects.filter(document=document).delete()
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+
+    def search(self, terms, after, limit):
+        found = SearchTerm.objects.filter(term__in=terms)
+        frequencies = dict(found.order_by().values('term').annotate(
+            documents=Count('pk')
+        ).values_list('term', 'documents'))
+        if len(frequencies) < len(terms):
+            return []
+        total = documents_count()
+        weight = Case(
+            *(When(term=term, then=Value(
+                math.log(1 + total / frequency)
+            )) for term, frequency in frequencies.items()),
+            output_field=FloatField(),
+        )
+        rows = found.order_by().values('document').annotate(
+            matched=Count('pk'),
+            score=Sum(
+                Value(-1.0) * (Value(1.0) + Ln(F('frequency'))) * weight,
+                output_field=FloatField(),
+            ),
+        ).filter(matched=len(terms))
+        if after is not None:
+            rows = rows.filter(
+                Q(score__gt=after[0])
+                | Q(score=after[0], document__gt=after[1])
+            )
+        return list(rows.order_by('score', 'document').values_list(
+            'score', 'document'
+        )[:limit])
+
+
+def documents_count():
+    """Число документов для idf; точность не важна, поэтому из кэша."""
+    total = cache.get(DOCUMENTS_CACHE_KEY)
+    if total is None:
+        total = sum(
+            model.objects.count() for model in (Post, Comment, Group)
+        )
+        cache.set(
+            DOCUMENTS_CACHE_KEY, total, settings.POSTS_SEARCH_COUNT_TIMEOUT
+        )
+    return total
+
+
+BACKENDS = {
+    'fts5': FtsBackend,
+    'table': TableBackend,
+}
+_fts_available = None
+
+
+def get_backend():
+    """Бэкенд из POSTS_SEARCH_BACKEND; 'auto' выбирает FTS5, если есть."""
+    global _fts_available
+    name = settings.POSTS_SEARCH_BACKEND
+    if name == 'auto':
+        if _fts_available is None:
+            _fts_available = (
+                FTS_TABLE in connection.introspection.table_names()
+            )
+        name = 'fts5' if _fts_available else 'table'
+    return BACKENDS[name]()
+
+
+def index_object(kind, obj):
+    terms = tokenize(document_text(kind, obj))
+    get_backend().index(document_id(kind, obj.pk), terms)
+
+
+def index_objects(kind, objs):
+    """Индексирует новые объекты одним вызовом бэкенда."""
+    get_backend().bulk_index([
+        (document_id(kind, obj.pk), tokenize(document_text(kind, obj)))
+        for obj in objs
+    ])
+
+
+def remove_object(kind, pk):
+    get_backend().remove(document_id(kind, pk))
+
+
+def rebuild():
+    """Пересобирает индекс целиком пачками по BATCH_SIZE."""
+    backend = get_backend()
+    sources = (
+        ('post', Post.objects.only('text')),
+        ('comment', Comment.objects.only('text')),
+        ('group', Group.objects.only('title', 'description')),
+    )
+    indexed = 0
+    with transaction.atomic():
+        backend.clear()
+        for kind, queryset in sources:
+            batch = []
+            for obj in queryset.order_by('pk').iterator():
+                batch.append(
+                    (document_id(kind, obj.pk),
+                     tokenize(document_text(kind, obj)))
+                )
+                if len(batch) >= BATCH_SIZE:
+                    backend.bulk_index(batch)
+                    indexed += len(batch)
+                    batch = []
+            backend.bulk_index(batch)
+            indexed += len(batch)
+    return indexed
+
+
+def encode_cursor(score, document):
+    raw = f'{score!r}|{document}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (score, rowid) последнего показанного документа или None."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        score, document = raw.split('|')
+        score, document = float(score), int(document)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if not math.isfinite(score):
+        return None
+    return score, document
+
+
+KIND_LOADERS = {
+    'post': loaders.feed_posts_by_pk,
+    'comment': loaders.comments_by_pk,
+    'group': loaders.groups_by_pk,
+}
+
+
+def _load(rows, data):
+    """Объекты выдачи: ключи каждого вида уходят одной пачкой в data."""
+    found = []
+    for score, document in rows:
+        kind, pk = split_document_id(document)
+        found.append((kind, data.load(KIND_LOADERS[kind], pk), score))
+    hits = []
+    for kind, deferred, score in found:
+        obj = deferred.get()
+        if obj is None:
+            continue
+        if kind == 'group':
+            url = reverse('posts:group_posts', args=[obj.slug])
+            text = obj.title
+        else:
+            post_id = obj.pk if kind == 'post' else obj.post_id
+            url = reverse('posts:post_detail', args=[post_id])
+            text = obj.text
+        hits.append(SearchHit(kind, obj, url, text, -score))
+    return hits
+
+
+def search(query, cursor=None, limit=RESULTS_ON_PAGE, data=None):
+    """Документы, содержащие все слова запроса, лучшие первыми.
+
+    data — RequestData запроса (core.dataloader); без него загрузчики
+    живут только в этом вызове.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return SearchResults([], None)
+    after = decode_cursor(cursor) if cursor else None
+    rows = get_backend().search(terms, after, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*rows[-1])
+    if data is None:
+        data = dataloader.RequestData()
+    return SearchResults(_load(rows, data), next_cursor)
@@ -0,0 +1,134 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import page_cache
+from . import cards, counters, follow_graph, search, timeline
+from .models import (
+    AuthorStats, Comment, FeedCounter, Follow, Group, Post, User
+)
+
+
+def purge_post_pages(post):
+    keys = ['feed', f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id:
+        keys.append(f'group:{post.group_id}')
+    page_cache.purge(*keys)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Запоминает прежнюю группу, чтобы перенести пост в счётчиках."""
+    if raw or instance._state.adding:
+        return
+    if update_fields and not {'group', 'group_id'} & set(update_fields):
+        return
+    instance._previous_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    purge_post_pages(instance)
+    search.index_object('post', instance)
+    if not created:
+        previous = getattr(instance, '_previous_group_id', instance.group_id)
+        if previous != instance.group_id:
+            counters.change_post_counts(previous, -1, total=False)
+            counters.change_post_counts(instance.group_id, 1, total=False)
+            if previous:
+                page_cache.purge(f'group:{previous}')
+        return
+    counters.change_author_stats(instance.author_id, 'posts_count', 1)
+    counters.change_post_counts(instance.group_id, 1)
+    if timeline.is_materialized():
+        timeline.fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_author_stats(instance.author_id, 'posts_count', -1)
+    counters.change_post_counts(instance.group_id, -1)
+    cards.forget_card(instance)
+    search.remove_object('post', instance.pk)
+    purge_post_pages(instance)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    """Строка счётчиков создаётся при записи, а не при первом чтении."""
+    if created and not raw:
+        AuthorStats.objects.get_or_create(author_id=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    cards.bump_version('author', instance.pk)
+    page_cache.purge(f'author:{instance.pk}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cards.bump_version('group', instance.pk)
+    page_cache.purge(f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_object('group', instance)
+    if created:
+        FeedCounter.objects.get_or_create(
+            key=counters.group_key(instance.pk)
+        )
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    search.remove_object('group', instance.pk)
+    FeedCounter.objects.filter(
+        key=counters.group_key(instance.pk)
+    ).delete()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_object('comment', instance)
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+        page_cache.purge(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    search.remove_object('comment', instance.pk)
+    page_cache.purge(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    follow_graph.forget(instance.user_id)
+    counters.change_author_stats(instance.author_id, 'followers_count', 1)
+    counters.change_author_stats(instance.user_id, 'following_count', 1)
+    if timeline.is_materialized():
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.forget(instance.user_id)
+    counters.change_author_stats(instance.author_id, 'followers_count', -1)
+    counters.change_author_stats(instance.user_id, 'following_count', -1)
+    if timeline.is_materialized():
+        timeline.trim(instance.user_id, instance.author_id)
@@ -0,0 +1,122 @@
+"""Стеммер Snowball для русского языка.
+
+Реализация алгоритма http://snowball.tartarus.org/algorithms/russian/
+stemmer.html: окончания ищутся в области RV, словообразовательные
+суффиксы — в R2.
+"""
+VOWELS = 'аеиоуыэюя'
+
+
+def _longest_first(*endings):
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+PERFECTIVE_GERUND_1 = _longest_first('в', 'вши', 'вшись')
+PERFECTIVE_GERUND_2 = _longest_first(
+    'ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись',
+)
+ADJECTIVE = _longest_first(
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE_1 = _longest_first('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = _longest_first('ивш', 'ывш', 'ующ')
+REFLEXIVE = _longest_first('ся', 'сь')
+VERB_1 = _longest_first(
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+    'ют', 'ны', 'ть', 'ешь', 'нно',
+)
+VERB_2 = _longest_first(
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+    'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+    'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+)
+NOUN = _longest_first(
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+DERIVATIONAL = _longest_first('ост', 'ость')
+SUPERLATIVE = _longest_first('ейш', 'ейше')
+
+
+def _regions(word):
+    """Начала областей RV и R2."""
+    rv = r1 = r2 = len(word)
+    for index, char in enumerate(word):
+        if char in VOWELS:
+            rv = index + 1
+            break
+    for index in range(1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            r1 = index + 1
+            break
+    for index in range(r1 + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            r2 = index + 1
+            break
+    return rv, r2
+
+
+def _longest(region, endings):
+    for ending in endings:
+        if region.endswith(ending):
+            return ending
+    return None
+
+
+def _strip(word, start, endings, after_a_endings=()):
+    """Отрезает самое длинное окончание в word[start:] или возвращает None.
+
+    Окончания из after_a_endings отрезаются только после «а» или «я».
+    """
+    region = word[start:]
+    ending = _longest(region, _longest_first(*endings, *after_a_endings))
+    if ending is None:
+        return None
+    if ending in after_a_endings and ending not in endings:
+        before = region[:-len(ending)]
+        if not before or before[-1] not in 'ая':
+            return None
+    return word[:-len(ending)]
+
+
+def _strip_adjectival(word, start):
+    stripped = _strip(word, start, ADJECTIVE)
+    if stripped is None:
+        return None
+    participle = _strip(stripped, start, PARTICIPLE_2, PARTICIPLE_1)
+    return stripped if participle is None else participle
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    stripped = _strip(word, rv, PERFECTIVE_GERUND_2, PERFECTIVE_GERUND_1)
+    if stripped is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        for step in (
+            _strip_adjectival,
+            lambda word, start: _strip(word, start, VERB_2, VERB_1),
+            lambda word, start: _strip(word, start, NOUN),
+        ):
+            stripped = step(word, rv)
+            if stripped is not None:
+                break
+    if stripped is not None:
+        word = stripped
+    if word[rv:].endswith('и'):
+        word = word[:-1]
+    derivational = _longest(word[max(r2, rv):], DERIVATIONAL)
+    if derivational:
+        word = word[:-len(derivational)]
+    superlative = _longest(word[rv:], SUPERLATIVE)
+    if superlative:
+        word = word[:-len(superlative)]
+    if word[rv:].endswith('нн'):
+        word = word[:-1]
+    elif not superlative and word[rv:].endswith('ь'):
+        word = word[:-1]
+    return word
@@ -0,0 +1,110 @@
+import gzip
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='api-group',
+            description='Описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Пост {number}',
+            )
+            for number in range(12)
+        ]
+        Comment.objects.create(
+            author=cls.reader,
+            post=cls.posts[0],
+            text='Комментарий',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_feeds_mirror_html_views(self):
+        """API отдаёт те же ленты, что и HTML-страницы."""
+        urls = {
+            reverse('posts:api_index'): None,
+            reverse('posts:api_group_posts', args=[self.group.slug]): 'group',
+            reverse('posts:api_profile', args=[self.author.username]): (
+                'author'
+            ),
+        }
+        for url, extra in urls.items():
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(
+                    [post['id'] for post in data['results']],
+                    [post.pk for post in reversed(self.posts[2:])]
+                )
+                self.assertIsNotNone(data['next_cursor'])
+                if extra:
+                    self.assertIn(extra, data)
+        data = self.client.get(
+            reverse('posts:api_profile', args=[self.author.username])
+        ).json()
+        self.assertEqual(data['author']['posts_count'], 12)
+
+    def test_cursor_pagination(self):
+        """Курсор ведёт на следующую страницу."""
+        url = reverse('posts:api_index')
+        cursor = self.client.get(url).json()['next_cursor']
+        data = self.client.get(url, {'cursor': cursor}).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[1].pk, self.posts[0].pk]
+        )
+        self.assertIsNone(data['next_cursor'])
+
+    def test_sparse_fields(self):
+        """?fields= оставляет только выбранные поля и колонки."""
+        url = reverse('posts:api_index')
+        with self.assertNumQueries(1):
+            data = self.client.get(url, {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_detail(self):
+        """Пост отдаётся вместе с комментариями."""
+        post = self.posts[0]
+        data = self.client.get(
+            reverse('posts:api_post_detail', args=[post.pk])
+        ).json()
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(data['group'], self.group.slug)
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(data['comments'][0]['author'], 'Reader')
+
+    def test_follow_requires_login(self):
+        """Лента подписок доступна только авторизованным."""
+        url = reverse('posts:api_follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['results']), 10)
+
+    def test_etag_and_gzip(self):
+        """Повторный запрос с ETag получает 304, ответ сжимается."""
+        url = reverse('posts:api_index')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'"id"', gzip.decompress(response.content))
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
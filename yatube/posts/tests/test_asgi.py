@@ -0,0 +1,165 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from core.asgi import WsgiToAsgi
+from posts.management.commands.bench_asgi import run_asgi, run_wsgi
+
+
+def echo_application(environ, start_response):
+    body = environ['wsgi.input'].read()
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+    return [
+        environ['REQUEST_METHOD'].encode(), b' ',
+        environ['PATH_INFO'].encode('latin1'), b'?',
+        environ['QUERY_STRING'].encode(), b' ',
+        environ.get('HTTP_X_TEST', '').encode(), b' ',
+        body,
+    ]
+
+
+def call(application, scope, messages):
+    sent = []
+    messages = list(messages)
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class BusyThreads:
+    """WSGI-приложение, которое считает занятые им потоки."""
+
+    def __init__(self, application):
+        self.application = application
+        self.lock = threading.Lock()
+        self.now = 0
+        self.peak = 0
+        self.threads = set()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+            self.threads.add(threading.get_ident())
+        try:
+            return self.application(environ, start_response)
+        finally:
+            with self.lock:
+                self.now -= 1
+
+
+async def run_waiting_clients(application, scope, clients, counted):
+    """Клиенты, которые ждут друг друга в receive и в конце send.
+
+    Возвращает статусы и число занятых потоков в каждый момент ожидания.
+    """
+    phases = {phase: [0, asyncio.Event()] for phase in ('receive', 'send')}
+    busy_while_waiting = []
+
+    async def wait_for_all(phase):
+        waiting = phases[phase]
+        waiting[0] += 1
+        if waiting[0] == clients:
+            waiting[1].set()
+        await asyncio.wait_for(waiting[1].wait(), 5)
+        busy_while_waiting.append(counted.now)
+
+    async def client():
+        response = {}
+
+        async def receive():
+            await wait_for_all('receive')
+            return {'type': 'http.request', 'body': b'x'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif not message.get('more_body'):
+                await wait_for_all('send')
+
+        await application(scope, receive, send)
+        return response['status']
+
+    statuses = await asyncio.gather(*(client() for _ in range(clients)))
+    return statuses, busy_while_waiting
+
+
+class AsgiTests(SimpleTestCase):
+    def setUp(self):
+        self.application = WsgiToAsgi(echo_application, max_workers=2)
+        self.scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/путь/',
+            'query_string': b'a=1',
+            'headers': [(b'x-test', b'one'), (b'x-test', b'two')],
+        }
+
+    def test_request_is_passed_to_wsgi(self):
+        """Запрос, заголовки и тело по частям доходят до WSGI."""
+        sent = call(self.application, self.scope, [
+            {'type': 'http.request', 'body': b'hello ', 'more_body': True},
+            {'type': 'http.request', 'body': b'world'},
+        ])
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertEqual(
+            body.decode(), 'POST /путь/?a=1 one,two hello world'
+        )
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_disconnect_skips_application(self):
+        """Если клиент ушёл, приложение не вызывается."""
+        sent = call(self.application, self.scope, [
+            {'type': 'http.request', 'body': b'part', 'more_body': True},
+            {'type': 'http.disconnect'},
+        ])
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        sent = call(self.application, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
+
+    def test_slow_clients_do_not_hold_threads(self):
+        """Медленные клиенты ждут в цикле событий, а не в потоках.
+
+        Все клиенты одновременно стоят в receive, а потом в send, хотя
+        потоков меньше, чем клиентов; приложение при этом занимает не
+        больше max_workers потоков.
+        """
+        clients, workers = 6, 2
+        counted = BusyThreads(echo_application)
+        statuses, busy_while_waiting = asyncio.run(run_waiting_clients(
+            WsgiToAsgi(counted, max_workers=workers), self.scope, clients,
+            counted,
+        ))
+        self.assertEqual(statuses, [201] * clients)
+        self.assertEqual(len(busy_while_waiting), clients * 2)
+        self.assertLessEqual(max(busy_while_waiting), workers)
+        self.assertLessEqual(counted.peak, workers)
+        self.assertLessEqual(len(counted.threads), workers)
+
+    def test_bench_runs_both_servers(self):
+        """Замер прогоняет всех клиентов через WSGI и ASGI."""
+        wsgi = run_wsgi(echo_application, ['/'], 3, 2, 0, 0)
+        asgi = asyncio.run(run_asgi(
+            WsgiToAsgi(echo_application, 2), ['/'], 3, 0, 0
+        ))
+        self.assertEqual(
+            [status for status, _ in wsgi + asgi], [201] * 6
+        )
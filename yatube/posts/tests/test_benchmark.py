@@ -0,0 +1,46 @@
+from django.db.models import F
+from django.test import TestCase
+
+from core.benchmarks import compare
+from .. import benchmark, urls
+from ..models import AuthorStats, Follow, Post
+
+
+class BenchmarkTests(TestCase):
+    def test_generate_and_measure_every_url(self):
+        """Генератор заполняет базу, замеры покрывают читающие адреса."""
+        scale = benchmark.generate(
+            users=10, posts=30, comments=20, groups=2, image_ratio=0
+        )
+        self.assertEqual(scale['posts'], 30)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            Post.objects.count()
+        )
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')
+        ).exists())
+        follows = set(Follow.objects.values_list('user', 'author'))
+        results = benchmark.run(repeat=1)
+        self.assertLessEqual(
+            {pattern.name for pattern in urls.urlpatterns}
+            - benchmark.WRITE_ROUTES,
+            set(results)
+        )
+        self.assertFalse(benchmark.WRITE_ROUTES & set(results))
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(result['status'], 200)
+                self.assertGreater(result['queries'], 0)
+        self.assertEqual(
+            set(Follow.objects.values_list('user', 'author')), follows
+        )
+
+    def test_compare_flags_regressions(self):
+        """Сравнение ловит рост запросов и задержки сверх допуска."""
+        baseline = {'main': {'p90_ms': 10, 'queries': 4, 'peak_kb': 100}}
+        results = {'main': {'p90_ms': 11, 'queries': 5, 'peak_kb': 200}}
+        self.assertEqual(
+            compare(results, baseline, tolerance=0.2),
+            [('main', 'queries', 4, 5), ('main', 'peak_kb', 100, 200)]
+        )
@@ -0,0 +1,152 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import comment_queue, search
+from ..models import Comment, Post, User
+
+QUEUE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    COMMENT_INGESTION='queue',
+    COMMENT_QUEUE_DIR=QUEUE_DIR,
+    COMMENT_QUEUE_FSYNC=False,
+    COMMENT_QUEUE_BATCH_SIZE=2,
+)
+class CommentQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Commenter')
+        cls.other = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(author=cls.other, text='Пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(QUEUE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(QUEUE_DIR, ignore_errors=True)
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:add_comment', args=[self.post.pk])
+
+    def comment(self, text):
+        return self.client.post(self.url, {'text': text})
+
+    def test_comment_is_queued_and_visible_to_author(self):
+        """Комментарий ждёт в очереди, но автор видит его сразу."""
+        response = self.comment('Из очереди')
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertFalse(Comment.objects.exists())
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertContains(self.client.get(detail), 'Из очереди')
+        other = Client()
+        other.force_login(self.other)
+        self.assertNotContains(other.get(detail), 'Из очереди')
+
+    def test_drain_saves_batches(self):
+        """drain сохраняет пачки, счётчики и поисковый индекс."""
+        for number in range(5):
+            self.comment(f'Комментарий номер {number}')
+        self.assertEqual(comment_queue.drain(), 5)
+        self.assertEqual(
+            Comment.objects.filter(post=self.post, author=self.user).count(),
+            5
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 5)
+        self.assertEqual(len(search.search('комментарий', limit=10).hits), 5)
+        self.assertEqual(comment_queue.drain(), 0)
+
+    def test_author_sees_comment_once_after_drain(self):
+        """После сохранения комментарий не показывается дважды."""
+        self.comment('Единственный')
+        comment_queue.drain()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.context['pending_comments'], [])
+        self.assertContains(response, 'Единственный', count=1)
+
+    def test_failed_batch_does_not_replay_saved_ones(self):
+        """После ошибки в пачке сохранённые пачки не повторяются."""
+        for number in range(5):
+            self.comment(f'Комментарий {number}')
+        commit_batch = comment_queue.commit_batch
+        calls = []
+
+        def failing(batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return commit_batch(batch)
+
+        with mock.patch.object(comment_queue, 'commit_batch', failing):
+            with self.assertRaises(RuntimeError):
+                comment_queue.drain()
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(comment_queue.drain(), 3)
+        self.assertEqual(
+            sorted(Comment.objects.values_list('text', flat=True)),
+            [f'Комментарий {number}' for number in range(5)]
+        )
+
+    def test_saved_comment_keeps_queued_time(self):
+        """Сохранённый комментарий получает время постановки в очередь."""
+        self.comment('Со временем')
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        pending = self.client.get(detail).context['pending_comments'][0]
+        comment_queue.drain()
+        self.assertEqual(Comment.objects.get().pub_date, pending.pub_date)
+
+    @override_settings(COMMENT_QUEUE_BATCH_SIZE=10)
+    def test_batch_size_does_not_add_queries(self):
+        """Пачка из четырёх сохраняется тем же числом запросов, что из двух."""
+        counts = []
+        for size in (2, 4):
+            for number in range(size):
+                self.comment(f'Комментарий {size} {number}')
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(comment_queue.drain(), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(search.search('комментарий', limit=10).hits), 6)
+
+    def test_comments_of_deleted_post_are_dropped(self):
+        """Комментарии к удалённому посту пропускаются."""
+        post = Post.objects.create(author=self.other, text='Удалится')
+        self.client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Текст'}
+        )
+        self.comment('Остаётся')
+        post.delete()
+        self.assertEqual(comment_queue.drain(), 1)
+        self.assertEqual(Comment.objects.get().text, 'Остаётся')
+
+    def test_drain_command(self):
+        """Команда drain_comments сохраняет очередь."""
+        self.comment('Через команду')
+        output = StringIO()
+        call_command('drain_comments', stdout=output)
+        self.assertIn('1', output.getvalue())
+        self.assertTrue(Comment.objects.filter(text='Через команду').exists())
+
+    @override_settings(COMMENT_INGESTION='sync')
+    def test_sync_mode_saves_immediately(self):
+        """В режиме sync комментарий сохраняется сразу."""
+        self.comment('Сразу')
+        self.assertTrue(Comment.objects.filter(text='Сразу').exists())
@@ -0,0 +1,136 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase)
+from django.urls import reverse
+
+from core import dataloader, metrics
+from .. import loaders
+from ..models import Comment, Post, User
+from ..utils import defer_page_context
+
+
+class DataLoaderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(2)
+        ]
+        for number in range(15):
+            Post.objects.create(author=cls.authors[0], text=f'Пост {number}')
+
+    def setUp(self):
+        self.data = dataloader.RequestData()
+
+    def test_batches_and_caches_keys(self):
+        """Ключи одной функции грузятся одним запросом, повторы из кэша."""
+        first = self.data.load(loaders.users_by_username, 'Author0')
+        second = self.data.load(loaders.users_by_username, 'Author1')
+        missing = self.data.load(loaders.users_by_username, 'Nobody')
+        with self.assertNumQueries(1):
+            self.assertEqual(first.get(), self.authors[0])
+            self.assertEqual(second.get(), self.authors[1])
+            self.assertIsNone(missing.get())
+        with self.assertNumQueries(0):
+            again = self.data.load(loaders.users_by_username, 'Author0')
+            self.assertEqual(again.get(), self.authors[0])
+        self.assertEqual(self.data.round_trips_saved, 3)
+        self.assertEqual(self.data.calls_overlapped, 0)
+
+    def test_runs_in_order_inside_transaction(self):
+        """В транзакции TestCase отложенные вызовы идут в потоке запроса."""
+        threads = []
+        for _ in range(2):
+            self.data.defer(lambda: threads.append(threading.get_ident()))
+        with mock.patch.object(dataloader, 'executor') as executor:
+            self.data.dispatch()
+        self.assertFalse(executor.called)
+        self.assertEqual(set(threads), {threading.get_ident()})
+        self.assertEqual(self.data.round_trips_saved, 0)
+        self.assertEqual(self.data.calls_overlapped, 0)
+
+    def test_deferred_page_matches_paginator(self):
+        """Отложенная страница совпадает со страницей Paginator."""
+        posts = Post.objects.order_by('-pub_date', '-pk')
+        for page, expected in (('2', [10, 15]), ('7', [10, 15]),
+                               ('abc', [0, 10]), (None, [0, 10])):
+            with self.subTest(page=page):
+                request = RequestFactory().get('/', {'page': page or ''})
+                page_obj = defer_page_context(request, posts)()
+                bottom, top = expected
+                self.assertEqual(list(page_obj), list(posts[bottom:top]))
+                self.assertEqual(page_obj.paginator.count, 15)
+
+
+class ConcurrentDataLoaderTests(TransactionTestCase):
+    """Другие потоки видят тестовую базу в памяти только вне транзакции."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.author = User.objects.create_user(username='Author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.client = Client()
+        self.client.force_login(self.author)
+        patcher = mock.patch.object(
+            dataloader, 'can_run_concurrently',
+            side_effect=lambda: not connection.in_atomic_block,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_independent_queries_run_in_workers(self):
+        """Первый вызов идёт в потоке запроса, остальные — в пуле."""
+        data = dataloader.RequestData()
+        threads = [data.defer(threading.get_ident) for _ in range(3)]
+        post = data.load(loaders.posts_by_pk, self.post.pk)
+        self.assertEqual(post.get(), self.post)
+        current = threading.get_ident()
+        self.assertEqual(threads[0].get(), current)
+        self.assertNotIn(current, [thread.get() for thread in threads[1:]])
+        self.assertEqual(data.round_trips_saved, 0)
+        self.assertEqual(data.calls_overlapped, 3)
+
+    def test_views_report_overlapped_calls(self):
+        """Профиль и страница поста отдают то же и считают параллельность."""
+        profile = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        detail = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(list(profile.context['page_obj']), [self.post])
+        self.assertEqual(profile.context['posts_count'], 1)
+        self.assertEqual(detail.context['post'], self.post)
+        self.assertEqual(len(detail.context['comments']), 1)
+        totals = metrics.snapshot()
+        for name in ('posts:profile', 'posts:post_detail'):
+            with self.subTest(name=name):
+                self.assertEqual(totals[name]['round_trips_saved'], 0)
+                self.assertEqual(totals[name]['calls_overlapped'], 1)
+
+    def test_search_batches_hits(self):
+        """Выдача поиска грузит объекты каждого вида одной пачкой."""
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Поездка {number}')
+        response = self.client.get(reverse('posts:search'), {'q': 'поездка'})
+        self.assertEqual(len(response.context['results'].hits), 3)
+        totals = metrics.snapshot()['posts:search']
+        self.assertEqual(totals['round_trips_saved'], 2)
+        self.assertEqual(totals['calls_overlapped'], 0)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Поездка удалась'
+        )
+        metrics.reset()
+        self.client.get(reverse('posts:search'), {'q': 'поездка'})
+        totals = metrics.snapshot()['posts:search']
+        self.assertEqual(totals['round_trips_saved'], 2)
+        self.assertEqual(totals['calls_overlapped'], 1)
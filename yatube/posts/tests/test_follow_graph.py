@@ -0,0 +1,77 @@
+from array import array
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follow_graph, timeline
+from ..models import Follow, Post, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        Follow.objects.create(user=cls.reader, author=cls.authors[2])
+        Post.objects.create(author=cls.authors[2], text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_lookups_use_cache(self):
+        """После первого чтения граф подписок не трогает базу."""
+        follow_graph.followee_ids(self.reader)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(follow_graph.followee_ids(self.reader)),
+                sorted([self.authors[0].pk, self.authors[2].pk])
+            )
+            self.assertTrue(
+                follow_graph.is_following(self.reader, self.authors[2].pk)
+            )
+            self.assertFalse(
+                follow_graph.is_following(self.reader, self.authors[1].pk)
+            )
+
+    def test_follow_views_update_cache(self):
+        """Подписка и отписка сразу видны в кэше."""
+        author = self.authors[1]
+        follow_graph.followee_ids(self.reader)
+        self.client.get(reverse('posts:profile_follow', args=[author]))
+        self.assertTrue(follow_graph.is_following(self.reader, author.pk))
+        response = self.client.get(reverse('posts:profile', args=[author]))
+        self.assertTrue(response.context['following'])
+        self.client.get(reverse('posts:profile_unfollow', args=[author]))
+        self.assertFalse(follow_graph.is_following(self.reader, author.pk))
+        self.assertFalse(Follow.objects.filter(
+            user=self.reader, author=author
+        ).exists())
+
+    def test_reused_id_does_not_see_old_graph(self):
+        """Список другого пользователя с тем же id не подхватывается."""
+        stale = array(follow_graph.TYPECODE, [self.authors[1].pk])
+        cache.set(
+            follow_graph.cache_key(self.reader.pk),
+            (
+                (self.reader.date_joined - timedelta(days=1)).timestamp(),
+                stale.tobytes(),
+            )
+        )
+        self.assertFalse(
+            follow_graph.is_following(self.reader, self.authors[1].pk)
+        )
+
+    def test_follow_feed_filters_by_cached_ids(self):
+        """Лента подписок фильтрует посты по id авторов из кэша."""
+        posts = timeline.feed_for(self.reader)
+        self.assertNotIn('posts_follow', str(posts.query))
+        self.assertEqual(list(posts), list(Post.objects.all()))
@@ -1,10 +1,13 @@
 import shutil
 import tempfile
+from io import BytesIO, StringIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.forms import PostForm
 from posts.models import Comment, Post, Group, User
@@ -108,6 +111,90 @@ class PostFormTests(TestCase):
             ).exists()
         )
 
+    def test_create_post_form_builds_thumbnail(self):
+        """После сохранения формы у поста есть миниатюра для ленты."""
+        uploaded = SimpleUploadedFile(
+            name='thumb.gif',
+            content=PostFormTests.post1.image.open('rb').read(),
+            content_type='image/gif'
+        )
+        self.authorized_client1.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.thumbnail)
+        self.assertEqual(
+            (post.thumbnail_width, post.thumbnail_height), (960, 339)
+        )
+        response = self.authorized_client1.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, post.thumbnail_url)
+
+    def test_generate_thumbnails_command(self):
+        """Команда строит миниатюры для уже загруженных картинок."""
+        call_command(
+            'generate_thumbnails', '--workers', '1', stdout=StringIO()
+        )
+        post = Post.objects.get(pk=PostFormTests.post1.pk)
+        self.assertTrue(post.thumbnail)
+
+    def post_image(self, name, content):
+        return self.authorized_client1.post(
+            reverse('posts:post_create'),
+            data={
+                'text': f'Пост с {name}',
+                'image': SimpleUploadedFile(name=name, content=content),
+            },
+        )
+
+    def test_create_post_form_rejects_large_images(self):
+        """Картинки сверх лимита байт или пикселей отклоняются."""
+        content = PostFormTests.post1.image.open('rb').read()
+        limits = (
+            {'POST_IMAGE_MAX_BYTES': len(content) - 1},
+            {'POST_IMAGE_MAX_PIXELS': 1},
+        )
+        for limit in limits:
+            with self.subTest(limit=limit), self.settings(**limit):
+                response = self.post_image('big.gif', content)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['form'].errors['image'])
+                self.assertFalse(
+                    Post.objects.filter(text='Пост с big.gif').exists()
+                )
+
+    def test_upload_limit_is_scoped_to_post_views(self):
+        """Лимит загрузки не глобальный, а CSRF в вью поста проверяется."""
+        self.assertNotIn(
+            'posts.uploads.LimitedTemporaryFileUploadHandler',
+            settings.FILE_UPLOAD_HANDLERS,
+        )
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(PostFormTests.user1)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Без токена'}
+        )
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.filter(text='Без токена').exists())
+
+    def test_create_post_form_strips_exif_and_reencodes(self):
+        """EXIF снимается, а не веб-форматы перекодируются."""
+        exif = Image.Exif()
+        exif[0x010f] = 'Camera'
+        jpeg = BytesIO()
+        Image.new('RGB', (4, 4)).save(jpeg, 'JPEG', exif=exif)
+        bmp = BytesIO()
+        Image.new('RGB', (4, 4)).save(bmp, 'BMP')
+        self.post_image('photo.jpg', jpeg.getvalue())
+        self.post_image('picture.bmp', bmp.getvalue())
+        photo = Post.objects.get(text='Пост с photo.jpg')
+        with Image.open(photo.image) as image:
+            self.assertNotIn('exif', image.info)
+        picture = Post.objects.get(text='Пост с picture.bmp')
+        self.assertTrue(picture.image.name.endswith('.jpg'))
+
     def test_create_post_unauthorized_form(self):
         """Неавторизованный пользователь не создаст пост."""
         post_count = Post.objects.count()
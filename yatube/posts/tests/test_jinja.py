@@ -0,0 +1,91 @@
+import re
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, User
+
+JINJA2_CONFIGURED = 'jinja2' in (engine.name for engine in engines.all())
+
+
+def normalize(html):
+    """Убирает различия в пробелах и записи кавычек между движками."""
+    html = ' '.join(html.decode().replace('&#34;', '&quot;').split())
+    return re.sub(r'\s*([<>])\s*', r'\1', html)
+
+
+@skipIf(not JINJA2_CONFIGURED, 'Jinja2 не установлен')
+class Jinja2FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(
+            username='Author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Группа <b>', slug='group', description='Описание & всё'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(13):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+                text=f'Пост "{number}" <script>',
+            )
+        Post.objects.create(
+            author=cls.author,
+            text='Пост с миниатюрой',
+            thumbnail='posts/thumbnails/960x339/post.jpg',
+            thumbnail_width=960,
+            thumbnail_height=339,
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def render(self, url, view=None):
+        cache.clear()
+        with override_settings(POSTS_JINJA2_VIEWS=[view] if view else []):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return normalize(response.content)
+
+    def test_feeds_match_django_templates(self):
+        """Ленты на Jinja2 дают тот же HTML, что и шаблоны Django."""
+        pages = {
+            'index': reverse('posts:main'),
+            'group_posts': reverse('posts:group_posts', args=['group']),
+            'profile': reverse('posts:profile', args=['Author']),
+            'follow_index': reverse('posts:follow_index'),
+        }
+        for view, url in pages.items():
+            for query in ('', '?page=2'):
+                with self.subTest(view=view, query=query):
+                    self.assertEqual(
+                        self.render(url + query, view),
+                        self.render(url + query),
+                    )
+
+    def test_switch_is_per_view(self):
+        """Настройка переключает только перечисленные вью."""
+        with override_settings(POSTS_JINJA2_VIEWS=['group_posts']):
+            django_page = self.client.get(reverse('posts:main'))
+            jinja_page = self.client.get(
+                reverse('posts:group_posts', args=['group'])
+            )
+        self.assertTemplateUsed(django_page, 'posts/index.html')
+        self.assertIsNone(jinja_page.context)
+
+    def test_index_fragment_is_cached(self):
+        """Фрагмент ленты на Jinja2 кэшируется, как {% cache %}."""
+        cache.clear()
+        with override_settings(POSTS_JINJA2_VIEWS=['index']):
+            self.client.get(reverse('posts:main'))
+            Post.objects.create(author=self.author, text='Свежий пост')
+            response = self.client.get(reverse('posts:main'))
+        self.assertNotContains(response, 'Свежий пост')
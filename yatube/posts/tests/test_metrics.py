@@ -0,0 +1,142 @@
+import os
+import sys
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.profiling import StackSamples
+from ..models import Post, User
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        for number in range(3):
+            Post.objects.create(author=cls.author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+
+    def test_records_queries_render_and_cache(self):
+        """Запрос учитывается под именем вью со временем SQL и шаблонов."""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.client.get(url)
+        self.client.get(url)
+        totals = metrics.snapshot()['posts:profile']
+        self.assertEqual(totals['requests'], 2)
+        self.assertGreater(totals['queries'], 0)
+        self.assertGreater(totals['sql_seconds'], 0)
+        self.assertGreater(totals['render_seconds'], 0)
+        self.assertLess(totals['render_seconds'], totals['duration_seconds'])
+        self.assertEqual(totals['cache_misses'], 3)
+        self.assertEqual(totals['cache_hits'], 3)
+
+    @override_settings(METRICS_QUERY_BUDGET=1)
+    def test_query_budget(self):
+        """Запросы сверх бюджета отмечаются и пишутся в лог."""
+        with self.assertLogs('yatube.metrics', 'WARNING') as logs:
+            self.client.get(reverse('posts:main'))
+        self.assertIn('"over_budget": true', logs.output[0])
+        self.assertEqual(metrics.snapshot()['posts:main']['over_budget'], 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_prometheus_endpoint(self):
+        """Итоги отдаются в формате Prometheus по токену."""
+        self.client.get(reverse('posts:main'))
+        response = self.client.get(
+            reverse('core:metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertContains(
+            response, 'yatube_view_requests_total{view="posts:main"} 1'
+        )
+        response = self.client.get(
+            reverse('core:metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_metrics_denied_by_default(self):
+        """Без токена метрики закрыты и для локального адреса прокси."""
+        response = self.client.get(
+            reverse('core:metrics'), REMOTE_ADDR='127.0.0.1'
+        )
+        self.assertEqual(response.status_code, 404)
+        with self.settings(METRICS_ALLOWED_IPS=['10.0.0.1']):
+            response = self.client.get(
+                reverse('core:metrics'), REMOTE_ADDR='10.0.0.1'
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = Client()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sampled_request_is_profiled(self):
+        """Выбранный запрос профилируется cProfile и попадает в отчёт."""
+        with self.settings(
+            PROFILING_ENABLED=True,
+            PROFILING_SAMPLE_RATE=1,
+            PROFILING_DIR=self.directory.name,
+        ):
+            self.client.get(reverse('posts:main'))
+        files = sorted(os.listdir(self.directory.name))
+        self.assertEqual(
+            [os.path.splitext(name)[1] for name in files], ['.json', '.prof']
+        )
+        output = StringIO()
+        call_command(
+            'profile_report',
+            dir=self.directory.name,
+            view='posts:main',
+            top=50,
+            stdout=output,
+        )
+        self.assertIn('posts:main', output.getvalue())
+        self.assertIn('posts/views.py', output.getvalue())
+
+    def test_fast_requests_are_not_saved(self):
+        """Быстрые запросы вне выборки не оставляют профилей."""
+        with self.settings(
+            PROFILING_ENABLED=True,
+            PROFILING_SAMPLE_RATE=0,
+            PROFILING_SLOW_MS=60_000,
+            PROFILING_DIR=self.directory.name,
+        ):
+            self.client.get(reverse('posts:main'))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_report_without_profiles_directory(self):
+        """Отчёт по несуществующему каталогу — понятная ошибка команды."""
+        missing = os.path.join(self.directory.name, 'missing')
+        with self.assertRaisesMessage(CommandError, missing):
+            call_command('profile_report', dir=missing, stdout=StringIO())
+
+    def test_stack_samples(self):
+        """Сэмплер считает собственное и общее время по стеку."""
+        samples = StackSamples()
+        samples.add(sys._getframe())
+        functions = {
+            name.rsplit('(', 1)[1]: (own, total)
+            for name, _, own, total in samples.functions(0.01)
+        }
+        self.assertEqual(functions['test_stack_samples)'], (0.01, 0.01))
+        self.assertEqual(functions['run)'][0], 0)
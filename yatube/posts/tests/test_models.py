@@ -1,6 +1,12 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
 
-from ..models import Follow, Group, Post, User
+from .. import counters, timeline
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -36,3 +42,133 @@ class PostModelTest(TestCase):
         for field, expected_value in field_str.items():
             with self.subTest(field=field):
                 self.assertEqual(str(field), expected_value)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+        )
+
+    def test_counters_follow_signals(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        stats = counters.get_author_stats(CountersTest.author)
+        self.assertEqual(stats.posts_count, 1)
+        comment = Comment.objects.create(
+            post=CountersTest.post,
+            author=CountersTest.reader,
+            text='Комментарий',
+        )
+        follow = Follow.objects.create(
+            user=CountersTest.reader,
+            author=CountersTest.author,
+        )
+        Post.objects.create(author=CountersTest.author, text='Второй')
+        stats.refresh_from_db()
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (2, 1)
+        )
+        CountersTest.post.refresh_from_db()
+        self.assertEqual(CountersTest.post.comments_count, 1)
+        comment.delete()
+        follow.delete()
+        stats.refresh_from_db()
+        CountersTest.post.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(CountersTest.post.comments_count, 0)
+
+    def test_rebuild_restores_counters(self):
+        """Команда пересчёта исправляет счётчики после bulk_create."""
+        Post.objects.bulk_create(
+            [Post(author=CountersTest.author, text=f'Пост {i}')
+             for i in range(3)]
+        )
+        Comment.objects.bulk_create([Comment(
+            post=CountersTest.post,
+            author=CountersTest.reader,
+            text='Комментарий',
+        )])
+        call_command('rebuild_counters', stdout=StringIO())
+        stats = AuthorStats.objects.get(author=CountersTest.author)
+        self.assertEqual(stats.posts_count, 4)
+        self.assertEqual(
+            AuthorStats.objects.get(author=CountersTest.reader).posts_count,
+            0
+        )
+        CountersTest.post.refresh_from_db()
+        self.assertEqual(CountersTest.post.comments_count, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Тестовый пост',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def full_scans(self, queryset):
+        """Шаги плана, читающие таблицу подряд, в том числе по индексу.
+
+        SCAN ... USING INDEX обходит весь индекс, а не ищет в нём, поэтому
+        тоже считается: в плане допустимы только SEARCH.
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = [row[-1] for row in cursor.fetchall()]
+        return [
+            detail.replace('SCAN TABLE ', 'SCAN ', 1) for detail in details
+            if detail.startswith('SCAN ') and detail != 'SCAN CONSTANT ROW'
+        ]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не читают таблицы целиком.
+
+        Исключение — общая лента: без фильтра она читает индекс по дате
+        с начала и останавливается на LIMIT.
+        """
+        author = QueryPlanTest.author
+        querysets = {
+            'index': Post.objects.for_feed(),
+            'group': QueryPlanTest.group.posts_in_group.for_feed(),
+            'profile': author.posts.for_feed(),
+            'comments': QueryPlanTest.post.comments.all(),
+        }
+        for mode in (timeline.JOIN, timeline.FANOUT, timeline.HYBRID):
+            with self.settings(POSTS_FOLLOW_FEED=mode):
+                querysets[f'follow_{mode}'] = timeline.feed_for(
+                    QueryPlanTest.reader
+                ).for_feed()
+        allowed = {
+            'index': ['SCAN posts_post USING INDEX post_pub_date_idx'],
+        }
+        for name, queryset in querysets.items():
+            with self.subTest(queryset=name):
+                self.assertEqual(
+                    self.full_scans(queryset[:10]), allowed.get(name, [])
+                )
+
+    def test_follow_is_unique(self):
+        """Повторная подписка запрещена в базе."""
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Follow.objects.create(
+                    user=QueryPlanTest.reader, author=QueryPlanTest.author
+                )
@@ -0,0 +1,159 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import counters
+from ..models import Group, Post, User
+from ..utils import POSTS_ON_PAGE, CountedPaginator, CursorPaginator
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([Post(
+            author=cls.user,
+            text=f'Тестовый текст {i}',
+            group=cls.group,
+        ) for i in range(POSTS_ON_PAGE * 2 + 3)])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(CursorPaginatorTests.user)
+
+    def test_pages_cover_all_posts_once(self):
+        """Курсорные страницы содержат все посты без повторов."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        page = paginator.get_page()
+        seen = list(page)
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            seen.extend(page)
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(page), 3)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertTrue(second.has_previous())
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор отдаёт первую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        page = paginator.get_page('not-a-cursor')
+        self.assertEqual(list(page), list(paginator.get_page()))
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_views_use_cursor_pagination(self):
+        """Ленты отдают курсорные страницы со ссылкой на следующую."""
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_posts',
+                    kwargs={'slug': CursorPaginatorTests.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': CursorPaginatorTests.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), POSTS_ON_PAGE)
+                self.assertContains(
+                    response, f'?cursor={page_obj.next_cursor}'
+                )
+                response = self.client.get(
+                    f'{url}?cursor={page_obj.next_cursor}'
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']), POSTS_ON_PAGE
+                )
+
+
+class CountedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POSTS_ON_PAGE * 2 + 3)
+        ])
+        cls.posts = Post.objects.order_by('-pub_date', '-pk')
+
+    def test_lagging_counter_does_not_clamp_pages(self):
+        """Отстающий счётчик не обрезает страницы: решает выборка."""
+        paginator = CountedPaginator(self.posts, POSTS_ON_PAGE, total=5)
+        page = paginator.get_page(3)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(list(page), list(self.posts[POSTS_ON_PAGE * 2:]))
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.count, POSTS_ON_PAGE * 2 + 3)
+        first = CountedPaginator(self.posts, POSTS_ON_PAGE, total=5).page(1)
+        self.assertTrue(first.has_next())
+
+    def test_overcounting_counter_falls_back_to_last_page(self):
+        """Лишние страницы по счётчику ведут на последнюю настоящую."""
+        paginator = CountedPaginator(self.posts, POSTS_ON_PAGE, total=100)
+        page = paginator.get_page(10)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page), 3)
+
+    def test_capped_count_and_page_window(self):
+        """Без счётчика COUNT(*) ограничен cap, номера страниц — окном."""
+        paginator = CountedPaginator(self.posts, 2, cap=15)
+        self.assertEqual(paginator.count, 15)
+        paginator.get_page(6)
+        self.assertEqual(list(paginator.page_range), list(range(3, 9)))
+        paginator.get_page(1)
+        self.assertEqual(list(paginator.page_range), [1, 2, 3, 4])
+
+    def test_feed_views_skip_count(self):
+        """Ленты не считают посты через COUNT(*)."""
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url + '?page=3')
+                self.assertEqual(len(response.context['page_obj']), 3)
+                self.assertFalse([
+                    query['sql'] for query in queries.captured_queries
+                    if 'COUNT(' in query['sql']
+                    and 'posts_post' in query['sql']
+                ])
+
+    def test_counters_follow_posts(self):
+        """Счётчики лент меняются при создании, переносе и удалении."""
+        total = counters.get_feed_count(counters.POSTS_KEY)
+        key = counters.group_key(self.other_group.pk)
+        post = Post.objects.create(
+            author=self.user, text='Новый', group=self.other_group
+        )
+        self.assertEqual(
+            counters.get_feed_count(counters.POSTS_KEY), total + 1
+        )
+        self.assertEqual(counters.get_feed_count(key), 1)
+        post.group = None
+        post.save()
+        self.assertEqual(counters.get_feed_count(key), 0)
+        post.delete()
+        self.assertEqual(counters.get_feed_count(counters.POSTS_KEY), total)
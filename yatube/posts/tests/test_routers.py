@@ -0,0 +1,141 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import page_cache
+from core.db import routers
+from .. import comment_queue
+from ..models import AuthorStats, Group, Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """TestCase держит тест в транзакции, а в ней реплика не читается."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Пост'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        routers.begin()
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_go_to_replica_only_inside_marked_views(self):
+        """Реплика используется только внутри помеченного вью."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with routers.reading_replica():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_pin_and_write_use_primary(self):
+        """После записи и с cookie чтение идёт на основную базу."""
+        with routers.reading_replica():
+            self.router.db_for_write(Post)
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            with connection.execute_wrapper(routers.track_writes):
+                Post.objects.filter(pk=self.post.pk).update(text='Новый')
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        routers.begin(pinned=True)
+        with routers.reading_replica():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_feed_views_read_from_replica(self):
+        """Ленты и страница поста читают с реплики."""
+        urls = [
+            reverse('posts:main'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with mock.patch.object(
+                    routers.random, 'choice', return_value='default'
+                ) as choice:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(choice.called)
+                self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_anonymous_reads_do_not_pin(self):
+        """Чтение без входа ничего не пишет, даже без строки счётчиков."""
+        urls = (
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for delete_stats in (False, True):
+            if delete_stats:
+                AuthorStats.objects.filter(author=self.user).delete()
+            for url in urls:
+                with self.subTest(url=url, delete_stats=delete_stats):
+                    with mock.patch.object(
+                        routers.random, 'choice', return_value='default'
+                    ):
+                        response = Client().get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertNotIn(
+                        settings.REPLICA_PIN_COOKIE, response.cookies
+                    )
+        self.assertFalse(AuthorStats.objects.filter(author=self.user).exists())
+
+    @override_settings(PAGE_CACHE_ENABLED=True, REPLICA_PIN_SECONDS=60)
+    def test_replica_page_is_not_cached_right_after_purge(self):
+        """Страница с реплики сразу после сброса не попадает в кэш."""
+        cache.clear()
+        page_cache.purge('feed')
+        url = reverse('posts:main')
+        for _ in range(2):
+            with mock.patch.object(
+                routers.random, 'choice', return_value='default'
+            ):
+                response = Client().get(url)
+            self.assertEqual(response['X-Page-Cache'], 'MISS')
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            with mock.patch.object(
+                routers.random, 'choice', return_value='default'
+            ):
+                Client().get(url)
+        self.assertEqual(Client().get(url)['X-Page-Cache'], 'HIT')
+
+    @override_settings(COMMENT_INGESTION='queue')
+    def test_unsaved_models_do_not_pin(self):
+        """GET, который только создаёт объекты в памяти, не закрепляет."""
+        cache.clear()
+        entry = {'post': self.post.pk, 'author': self.user.pk,
+                 'text': 'В очереди', 'queued': time.time()}
+        cache.set(
+            comment_queue.pending_key(self.post.pk, self.user.pk), [entry]
+        )
+        with mock.patch.object(
+            routers.random, 'choice', return_value='default'
+        ):
+            response = self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk])
+            )
+        self.assertContains(response, 'В очереди')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_write_sets_pin_cookie(self):
+        """Запрос с записью закрепляет клиента за основной базой."""
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        with mock.patch.object(routers.random, 'choice') as choice:
+            self.client.get(reverse('posts:main'))
+        self.assertFalse(choice.called)
@@ -0,0 +1,138 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Group, Post, User
+from ..stemmer import stem
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Словоформы сводятся к одной основе."""
+        self.assertEqual(stem('публикации'), stem('публикация'))
+        self.assertEqual(stem('подписками'), stem('подписка'))
+        self.assertEqual(stem('Ёлки'), 'елк')
+
+
+class SearchTests(TestCase):
+    backend = 'fts5'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Searcher')
+        cls.group = Group.objects.create(
+            title='Путешествия',
+            slug='travel',
+            description='Рассказы о дальних поездках',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Длинная поездка на поезде через всю страну',
+        )
+        cls.comment = Comment.objects.create(
+            author=cls.user,
+            post=cls.post,
+            text='Мечтаю о такой поездке',
+        )
+        Post.objects.create(author=cls.user, text='Рецепт пирога')
+
+    def setUp(self):
+        self.override = override_settings(POSTS_SEARCH_BACKEND=self.backend)
+        self.override.enable()
+        search.rebuild()
+
+    def tearDown(self):
+        self.override.disable()
+
+    def test_finds_all_kinds_by_word_form(self):
+        """Поиск по основе находит пост, комментарий и группу."""
+        hits = search.search('поездки').hits
+        self.assertCountEqual(
+            [(hit.kind, hit.obj.pk) for hit in hits],
+            [
+                ('post', self.post.pk),
+                ('comment', self.comment.pk),
+                ('group', self.group.pk),
+            ]
+        )
+
+    def test_all_terms_required(self):
+        """Документ должен содержать все слова запроса."""
+        hits = search.search('поезд страны').hits
+        self.assertEqual([hit.obj for hit in hits], [self.post])
+        self.assertEqual(search.search('поезд пирог').hits, [])
+
+    def test_signals_update_index(self):
+        """Изменения объектов сразу попадают в индекс."""
+        self.post.text = 'Пост про горы'
+        self.post.save()
+        self.assertEqual(
+            [hit.kind for hit in search.search('поезд').hits], []
+        )
+        self.comment.delete()
+        self.assertEqual(
+            [hit.kind for hit in search.search('поездка').hits], ['group']
+        )
+
+    def test_keyset_pagination(self):
+        """Страницы по курсору не повторяют и не теряют документы."""
+        for number in range(5):
+            Post.objects.create(author=self.user, text=f'Поездка {number}')
+        seen = []
+        cursor = None
+        while True:
+            results = search.search('поездка', cursor, limit=2)
+            seen.extend((hit.kind, hit.obj.pk) for hit in results.hits)
+            cursor = results.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(len(set(seen)), 8)
+
+    def test_views(self):
+        """Страница поиска и API отдают найденное."""
+        client = Client()
+        response = client.get(reverse('posts:search'), {'q': 'пирога'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertContains(response, 'Рецепт пирога')
+        data = client.get(
+            reverse('posts:search_api'), {'q': 'путешествие'}
+        ).json()
+        self.assertEqual(data['results'][0]['url'], reverse(
+            'posts:group_posts', args=[self.group.slug]
+        ))
+        self.assertIsNone(data['next_cursor'])
+
+    def test_rebuild_command(self):
+        """Команда пересобирает индекс всех объектов."""
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(search.search('страну').hits), 1)
+
+
+class TableSearchTests(SearchTests):
+    backend = 'table'
+
+    def test_ranking_runs_in_sql(self):
+        """Ранжирование и LIMIT в SQL, число документов берётся из кэша."""
+        cache.delete(search.DOCUMENTS_CACHE_KEY)
+        search.search('поездка')
+        with CaptureQueriesContext(connection) as queries:
+            rows = search.get_backend().search(
+                search.tokenize('поездка'), None, 2
+            )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows, sorted(rows))
+        self.assertEqual(len(queries), 2)
+        self.assertIn('LIMIT 2', queries[1]['sql'])
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if 'posts_post' in query['sql']
+        ])
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+
+from core.management.commands.bench_sqlite import connect
+
+
+class SqliteBackendTests(SimpleTestCase):
+    def test_new_connection_applies_pragmas(self):
+        """Новое соединение включает WAL и остальные прагмы."""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = connect(
+                'core.db.backends.sqlite3',
+                os.path.join(directory, 'test.sqlite3'),
+                {'pragmas': {'cache_size': -1000}},
+            )
+            try:
+                with wrapper.cursor() as cursor:
+                    values = {}
+                    for name in ('journal_mode', 'synchronous',
+                                 'busy_timeout', 'cache_size', 'temp_store'):
+                        cursor.execute(f'PRAGMA {name}')
+                        values[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(values, {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 5000,
+            'cache_size': -1000,
+            'temp_store': 2,
+        })
+
+    def test_project_uses_tuned_backend(self):
+        """Проект работает через настроенный бэкенд."""
+        self.assertEqual(connection.vendor, 'sqlite')
+        self.assertEqual(
+            connection.settings_dict['ENGINE'], 'core.db.backends.sqlite3'
+        )
+
+    def test_bench_sqlite_command(self):
+        """bench_sqlite сравнивает обе настройки."""
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'bench_sqlite', seconds=0.2, rows=100, readers=2, writers=1,
+                output=output.name, stdout=StringIO(),
+            )
+            with open(output.name) as source:
+                results = json.load(source)
+        self.assertEqual(set(results), {'stock', 'tuned'})
+        self.assertGreater(results['tuned']['read']['ops_per_s'], 0)
+        self.assertGreater(results['tuned']['write']['ops_per_s'], 0)
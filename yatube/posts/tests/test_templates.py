@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.shortcuts import render
+from django.template import Context, Engine, engines
+from django.template.loader_tags import IncludeNode
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import NoReverseMatch, reverse
+
+from core.fast_urls import fast_url
+from posts.management.commands.bench_render import (
+    DUMMY_CACHE, LOADERS, make_page, templates_with
+)
+
+
+class TemplatePipelineTests(SimpleTestCase):
+    def test_includes_are_inlined(self):
+        """Постоянные include встраиваются в скомпилированный шаблон."""
+        names = ('base.html', 'posts/index.html', 'posts/post_detail.html')
+        with override_settings(TEMPLATES=templates_with(LOADERS['inlined'])):
+            engine = engines.all()[0].engine
+            for name in names:
+                with self.subTest(name=name):
+                    template = engine.get_template(name)
+                    self.assertEqual(
+                        template.nodelist.get_nodes_by_type(IncludeNode), []
+                    )
+
+    def test_inlined_output_matches_stock_loader(self):
+        """Страница с встроенными include совпадает с обычной."""
+        group, page_obj = make_page(3)
+        request = RequestFactory().get('/group/group/')
+        request.user = AnonymousUser()
+        context = {'group': group, 'page_obj': page_obj}
+        pages = {}
+        for name in ('stock', 'inlined'):
+            with override_settings(
+                TEMPLATES=templates_with(LOADERS[name]), CACHES=DUMMY_CACHE
+            ):
+                pages[name] = render(
+                    request, 'posts/group_list.html', context
+                ).content
+        self.assertEqual(pages['inlined'], pages['stock'])
+        self.assertIn(b'/profile/author1/', pages['inlined'])
+
+    def test_inlined_include_keeps_own_render_state(self):
+        """cycle во встроенном include начинается заново на каждый вызов."""
+        templates = {
+            'row.html': '{% cycle "odd" "even" %}',
+            'page.html': (
+                '{% for i in items %}{% include "row.html" %}'
+                '{% cycle "a" "b" %}|{% endfor %}'
+            ),
+        }
+        locmem = ('django.template.loaders.locmem.Loader', templates)
+        pages = {}
+        for name, loaders in (
+            ('stock', [locmem]),
+            ('inlined', [('core.template_loaders.Loader', [locmem])]),
+        ):
+            template = Engine(loaders=loaders).get_template('page.html')
+            pages[name] = template.render(Context({'items': range(3)}))
+        self.assertEqual(pages['inlined'], pages['stock'])
+        self.assertEqual(pages['inlined'], 'odda|oddb|odda|')
+
+    def test_fast_url_matches_reverse(self):
+        """fast_url даёт тот же адрес, что и reverse()."""
+        cases = (
+            ('posts:profile', 'author'),
+            ('posts:profile', 'Имя с пробелом'),
+            ('posts:post_detail', 42),
+            ('posts:group_posts', 'some-slug'),
+        )
+        for viewname, value in cases:
+            with self.subTest(viewname=viewname, value=value):
+                self.assertEqual(
+                    fast_url(viewname, value), reverse(viewname, args=[value])
+                )
+        with self.assertRaises(NoReverseMatch):
+            fast_url('posts:profile', 'a/b')
+        with self.assertRaises(NoReverseMatch):
+            fast_url('posts:group_posts', 'не слаг')
+
+    def test_bench_render_command(self):
+        output = StringIO()
+        call_command('bench_render', size=2, repeat=2, stdout=output)
+        for name in ('stock', 'cached', 'inlined', 'fast_url'):
+            self.assertIn(name, output.getvalue())
@@ -0,0 +1,117 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry, User
+
+
+@override_settings(POSTS_FOLLOW_FEED=timeline.FANOUT)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(TimelineTests.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        """Подписка заполняет ленту, новый пост попадает в неё сразу."""
+        self.client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': TimelineTests.author.username}
+        ))
+        self.assertEqual(self.feed(), [TimelineTests.old_post])
+        new_post = Post.objects.create(
+            author=TimelineTests.author,
+            text='Пост после подписки',
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=TimelineTests.reader, post=new_post
+        ).exists())
+        self.assertEqual(self.feed(), [new_post, TimelineTests.old_post])
+
+    def test_unfollow_trims_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(
+            user=TimelineTests.reader,
+            author=TimelineTests.author,
+        )
+        self.client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': TimelineTests.author.username}
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=TimelineTests.reader
+        ).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(
+        POSTS_FOLLOW_FEED=timeline.HYBRID,
+        POSTS_FANOUT_MAX_FOLLOWERS=0,
+    )
+    def test_hybrid_merges_popular_authors_at_read_time(self):
+        """Посты популярных авторов не раскладываются, но есть в ленте."""
+        Follow.objects.create(
+            user=TimelineTests.reader,
+            author=TimelineTests.author,
+        )
+        new_post = Post.objects.create(
+            author=TimelineTests.author,
+            text='Пост популярного автора',
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [new_post, TimelineTests.old_post])
+
+    @override_settings(
+        POSTS_FOLLOW_FEED=timeline.HYBRID,
+        POSTS_FANOUT_MAX_FOLLOWERS=1,
+        POSTS_FEED_COUNT_CAP=2,
+    )
+    def test_hybrid_unions_limited_slices(self):
+        """Гибридная лента — UNION двух срезов не длиннее лимита."""
+        popular = User.objects.create_user(username='Popular')
+        fan = User.objects.create_user(username='Fan')
+        Follow.objects.create(user=fan, author=popular)
+        Follow.objects.create(user=TimelineTests.reader, author=popular)
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        posts = [
+            Post.objects.create(author=author, text=f'Пост {number}')
+            for number, author in enumerate(
+                [popular, TimelineTests.author] * 3
+            )
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            feed = self.feed()
+        self.assertEqual(feed, posts[:1:-1])
+        sql = next(
+            query['sql'] for query in queries.captured_queries
+            if 'UNION' in query['sql'] and 'COUNT(' not in query['sql']
+        )
+        self.assertEqual(sql.count('LIMIT 2'), 2)
+
+    def test_rebuild_matches_join_feed(self):
+        """Пересборка лент совпадает с лентой, собранной через Follow."""
+        Follow.objects.create(
+            user=TimelineTests.reader,
+            author=TimelineTests.author,
+        )
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild()
+        with self.settings(POSTS_FOLLOW_FEED=timeline.JOIN):
+            expected = self.feed()
+        self.assertEqual(self.feed(), expected)
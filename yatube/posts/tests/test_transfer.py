@@ -0,0 +1,168 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
+
+OLD_DATE = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='transfer',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Старый пост про путешествия',
+        )
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=OLD_DATE)
+        Comment.objects.create(
+            author=cls.reader,
+            post=cls.post,
+            text='Комментарий',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export_all(self, extension):
+        paths = {}
+        for kind in ('groups', 'posts', 'comments', 'follows'):
+            paths[kind] = os.path.join(self.directory.name, kind + extension)
+            call_command(
+                'export_data', kind,
+                format=extension[1:], output=paths[kind], stderr=StringIO(),
+            )
+        return paths
+
+    def import_all(self, paths):
+        for kind in ('groups', 'posts', 'comments', 'follows'):
+            call_command(
+                'import_data', kind, paths[kind],
+                batch_size=1, stdout=StringIO(),
+            )
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют id, даты и связи."""
+        for extension in ('.ndjson', '.csv'):
+            with self.subTest(extension=extension):
+                paths = self.export_all(extension)
+                User.objects.all().delete()
+                Group.objects.all().delete()
+                self.import_all(paths)
+                post = Post.objects.get(pk=self.post.pk)
+                self.assertEqual(post.pub_date, OLD_DATE)
+                self.assertEqual(post.author.username, 'Author')
+                self.assertEqual(post.group.slug, 'transfer')
+                self.assertEqual(post.comments_count, 1)
+                self.assertTrue(Follow.objects.filter(
+                    user__username='Reader', author__username='Author'
+                ).exists())
+                self.assertEqual(
+                    AuthorStats.objects.get(
+                        author__username='Author'
+                    ).followers_count,
+                    1
+                )
+                self.assertEqual(
+                    [hit.obj for hit in search.search('путешествие').hits],
+                    [post]
+                )
+
+    def test_repeated_import(self):
+        """Повтор не создаёт дубликатов, а id не загружаются поверх чужих."""
+        paths = self.export_all('.ndjson')
+        for kind in ('groups', 'follows'):
+            stdout = StringIO()
+            call_command('import_data', kind, paths[kind], stdout=stdout)
+            self.assertIn('Добавлено строк: 0', stdout.getvalue())
+        for kind in ('posts', 'comments'):
+            with self.assertRaisesMessage(CommandError, 'не пуста'):
+                call_command(
+                    'import_data', kind, paths[kind], stdout=StringIO()
+                )
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_rows_without_id_get_new_pk(self):
+        """Строки без id добавляются в непустую базу с новыми id."""
+        path = os.path.join(self.directory.name, 'comments.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                f'{{"post":{self.post.pk},"author":"New","text":"Ещё"}}\n'
+            )
+        stdout = StringIO()
+        call_command('import_data', 'comments', path, stdout=stdout)
+        self.assertIn('Добавлено строк: 1', stdout.getvalue())
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_bad_value_names_line(self):
+        """Неверное значение останавливает загрузку с номером строки."""
+        path = os.path.join(self.directory.name, 'comments.csv')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write('post,author,text,pub_date\n')
+            stream.write(f'{self.post.pk},New,Текст,\n')
+            stream.write('abc,New,Текст,\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 3'):
+            call_command('import_data', 'comments', path, stdout=StringIO())
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_empty_required_field_names_line(self):
+        """Пустой текст в CSV — ошибка загрузки с номером строки."""
+        path = os.path.join(self.directory.name, 'posts.csv')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write('author,group,text,pub_date\n')
+            stream.write('New,,Пост,\n')
+            stream.write('New,,,\n')
+        with self.assertRaisesMessage(
+            CommandError, 'Строка 3: пустое поле text'
+        ):
+            call_command('import_data', 'posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_mixed_ids_are_refused(self):
+        """Строки с id и без id в одном файле не загружаются."""
+        Comment.objects.all().delete()
+        path = os.path.join(self.directory.name, 'comments.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                f'{{"post":{self.post.pk},"author":"New","text":"Без id"}}\n'
+            )
+            stream.write(
+                f'{{"id":1,"post":{self.post.pk},"author":"New",'
+                '"text":"С id"}\n'
+            )
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            call_command(
+                'import_data', 'comments', path,
+                batch_size=1, stdout=StringIO(),
+            )
+
+    def test_unknown_group(self):
+        """Ссылка на несуществующую группу останавливает загрузку."""
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"author":"New","group":"missing","text":"Пост"}\n'
+            )
+        with self.assertRaisesMessage(CommandError, 'missing'):
+            call_command('import_data', 'posts', path, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text='Пост').exists())
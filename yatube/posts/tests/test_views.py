@@ -1,14 +1,21 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django import forms
 
-from ..models import Follow, Post, Group, User
+from core import page_cache
+
+from .. import cards
+from ..models import Comment, Follow, Post, Group, User
+from ..utils import COMMENTS_ON_PAGE
 
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -290,3 +297,302 @@ class PostsViewTests(TestCase):
         response2 = self.authorized_client2.get(reverse('posts:follow_index'))
         self.assertIn(self.post1, response1.context['page_obj'])
         self.assertNotIn(PostsViewTests.post, response2.context['page_obj'])
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FeedQueriesTests.reader)
+        cache.clear()
+
+    def create_posts(self, count):
+        for i in range(count):
+            Post.objects.create(
+                author=FeedQueriesTests.author,
+                group=FeedQueriesTests.group,
+                text=f'Тестовый текст {i}',
+            )
+
+    def count_queries(self, url):
+        self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feed_query_count_does_not_depend_on_posts(self):
+        """Число запросов ленты не зависит от количества постов."""
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_posts',
+                    kwargs={'slug': FeedQueriesTests.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': FeedQueriesTests.author.username}),
+            reverse('posts:follow_index'),
+        )
+        self.create_posts(1)
+        single = {url: self.count_queries(url) for url in urls}
+        self.create_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author',
+            first_name='Старое',
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Тестовый текст',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+        cards.reset_stats()
+
+    def get_group_page(self):
+        return self.guest_client.get(reverse(
+            'posts:group_posts',
+            kwargs={'slug': PostCardCacheTests.group.slug}
+        ))
+
+    def test_card_is_served_from_cache(self):
+        """Повторный показ карточки берётся из кэша."""
+        self.get_group_page()
+        self.get_group_page()
+        self.assertEqual(cards.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_card_is_invalidated_by_changes(self):
+        """Правка поста или автора сбрасывает карточку."""
+        self.get_group_page()
+        post = PostCardCacheTests.post
+        post.text = 'Новый текст'
+        post.save()
+        self.assertContains(self.get_group_page(), 'Новый текст')
+        author = PostCardCacheTests.author
+        author.first_name = 'Новое'
+        author.save()
+        self.assertContains(self.get_group_page(), 'Новое')
+        self.assertEqual(cards.get_stats(), {'hits': 0, 'misses': 3})
+
+    def test_page_reads_cards_in_two_round_trips(self):
+        """Карточки страницы читаются из кэша двумя get_many."""
+        for number in range(3):
+            Post.objects.create(
+                author=PostCardCacheTests.author,
+                group=PostCardCacheTests.group,
+                text=f'Пост {number}',
+            )
+        self.get_group_page()
+        with mock.patch.object(cards, 'cache', wraps=cache) as card_cache:
+            self.get_group_page()
+        self.assertEqual(card_cache.get_many.call_count, 2)
+        self.assertFalse(card_cache.get.called)
+        self.assertEqual(cards.get_stats(), {'hits': 4, 'misses': 4})
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Тестовый текст',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PageCacheTests.reader)
+        cache.clear()
+
+    def test_anonymous_pages_are_cached(self):
+        """Анонимам страницы отдаются из кэша с заголовками кэширования."""
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': PageCacheTests.post.pk})
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn(f'post:{PageCacheTests.post.pk}',
+                      response['Surrogate-Key'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_authorized_pages_are_not_cached(self):
+        """Авторизованным пользователям страницы не кэшируются."""
+        response = self.authorized_client.get(reverse('posts:main'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_writes_purge_affected_pages(self):
+        """Комментарий и новый пост сбрасывают только свои страницы."""
+        detail_url = reverse('posts:post_detail',
+                             kwargs={'post_id': PageCacheTests.post.pk})
+        group_url = reverse('posts:group_posts',
+                            kwargs={'slug': PageCacheTests.group.slug})
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Описание',
+        )
+        other_url = reverse('posts:group_posts',
+                            kwargs={'slug': other_group.slug})
+        for url in (detail_url, group_url, other_url):
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': PageCacheTests.post.pk}),
+            data={'text': 'Новый комментарий'},
+        )
+        response = self.guest_client.get(detail_url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Новый комментарий')
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': PageCacheTests.group.pk},
+        )
+        response = self.guest_client.get(group_url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Новый пост')
+        response = self.guest_client.get(other_url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_new_post_reaches_cached_index(self):
+        """Новый пост сбрасывает и страницу, и фрагмент главной."""
+        for number in range(3):
+            Post.objects.create(
+                author=PageCacheTests.author, text=f'Старый пост {number}'
+            )
+        url = reverse('posts:main')
+        self.guest_client.get(url)
+        self.assertEqual(self.guest_client.get(url)['X-Page-Cache'], 'HIT')
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Свежий пост'}
+        )
+        cached = [self.guest_client.get(url) for _ in range(3)]
+        self.assertEqual(
+            [response['X-Page-Cache'] for response in cached],
+            ['MISS', 'HIT', 'HIT']
+        )
+        for response in cached:
+            self.assertContains(response, 'Свежий пост')
+
+    def test_purge_during_render_is_not_lost(self):
+        """Сброс во время рендера не даёт закэшировать старую страницу."""
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': PageCacheTests.post.pk})
+        render = page_cache.tag_response
+
+        def purge_while_rendering(response, *keys):
+            page_cache.purge(f'post:{PageCacheTests.post.pk}')
+            return render(response, *keys)
+
+        with mock.patch(
+            'posts.views.tag_response', side_effect=purge_while_rendering
+        ):
+            self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        for number in range(COMMENTS_ON_PAGE + 5):
+            commenter = User.objects.create_user(username=f'Reader{number}')
+            Comment.objects.create(
+                author=commenter,
+                post=cls.post,
+                text=f'Комментарий {number}',
+            )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_post_detail_shows_first_page(self):
+        """На странице поста первая страница комментариев и их число."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_ON_PAGE)
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, f'Комментариев: {COMMENTS_ON_PAGE + 5}')
+
+    def test_comment_authors_do_not_add_queries(self):
+        """Авторы комментариев приходят тем же запросом."""
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), 2)
+
+    def test_fragment_continues_from_cursor(self):
+        """Фрагмент и API отдают следующую страницу по курсору."""
+        first = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'cursor': first.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertContains(response, 'Комментарий 0')
+        self.assertNotContains(response, 'data-fragment')
+        data = self.client.get(
+            reverse('posts:api_post_comments', args=[self.post.pk]),
+            {'cursor': first.next_cursor},
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            [f'Комментарий {number}' for number in range(4, -1, -1)]
+        )
+        self.assertIsNone(data['comments_next_cursor'])
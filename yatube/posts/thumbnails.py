@@ -0,0 +1,88 @@
+"""Фоновая подготовка миниатюр для Post.image.
+
+Миниатюры всех размеров из POST_THUMBNAIL_SIZES строятся после
+сохранения PostForm в пуле потоков, а размер для ленты
+(POST_THUMBNAIL_FEED_SIZE) записывается в строку поста, чтобы шаблоны
+не вызывали sorl во время запроса.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core import page_cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def generate(post_id):
+    """Строит миниатюры поста и сохраняет размер для ленты."""
+    post = Post.objects.only('image').filter(pk=post_id).first()
+    if post is None:
+        return False
+    fields = {
+        'thumbnail': '',
+        'thumbnail_width': None,
+        'thumbnail_height': None,
+    }
+    if post.image:
+        for geometry, options in settings.POST_THUMBNAIL_SIZES.items():
+            try:
+                thumbnail = get_thumbnail(post.image, geometry, **options)
+            except Exception:
+                logger.exception('Не удалось построить миниатюру %s', post_id)
+                return False
+            if not thumbnail.exists():
+                return False
+            if geometry == settings.POST_THUMBNAIL_FEED_SIZE:
+                fields.update(
+                    thumbnail=thumbnail.name,
+                    thumbnail_width=thumbnail.width,
+                    thumbnail_height=thumbnail.height,
+                )
+    Post.objects.filter(pk=post_id).update(updated=timezone.now(), **fields)
+    page_cache.purge(f'post:{post_id}')
+    return True
+
+
+def _run(post_id):
+    try:
+        return generate(post_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(post):
+    """Ставит построение миниатюр поста в очередь пула."""
+    if getattr(connection, 'is_in_memory_db', lambda: False)():
+        # Другие потоки не видят незакоммиченных данных в памяти.
+        generate(post.pk)
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, post.pk))
+
+
+def generate_many(post_ids):
+    """Строит миниатюры для пачки постов; для пула процессов."""
+    try:
+        return sum(bool(generate(post_id)) for post_id in post_ids)
+    finally:
+        close_old_connections()
@@ -0,0 +1,136 @@
+"""Лента подписок с раскладкой постов при публикации (fan-out on write).
+
+В режиме hybrid посты авторов с числом подписчиков больше
+POSTS_FANOUT_MAX_FOLLOWERS не раскладываются, а подмешиваются при чтении:
+лента — UNION последних записей TimelineEntry и последних постов таких
+авторов, каждая часть не длиннее POSTS_FEED_COUNT_CAP.
+"""
+from django.conf import settings
+
+from . import follow_graph
+from .counters import get_author_stats
+from .models import Follow, Post, TimelineEntry, User
+
+JOIN: str = 'join'
+FANOUT: str = 'fanout'
+HYBRID: str = 'hybrid'
+
+BATCH_SIZE: int = 500
+# Больше авторов в IN (...) не подставляем, а соединяем с Follow.
+MAX_IN_AUTHORS: int = 500
+
+
+def get_mode():
+    return settings.POSTS_FOLLOW_FEED
+
+
+def is_materialized():
+    return get_mode() in (FANOUT, HYBRID)
+
+
+def skips_fan_out(author_id):
+    """Посты автора подмешиваются при чтении, а не раскладываются."""
+    return (
+        get_mode() == HYBRID
+        and get_author_stats(User(pk=author_id)).followers_count
+        > settings.POSTS_FANOUT_MAX_FOLLOWERS
+    )
+
+
+def celebrity_ids(user):
+    """Авторы из подписок пользователя, чьи посты не раскладываются."""
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=(
+            settings.POSTS_FANOUT_MAX_FOLLOWERS
+        ),
+    ).values('author_id')
+
+
+def fan_out(post):
+    if skips_fan_out(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in follower_ids.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if skips_fan_out(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.POSTS_TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты заново, например после смены режима."""
+    entries = TimelineEntry.objects.all()
+    follows = Follow.objects.order_by('user_id')
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    entries.delete()
+    if not is_materialized():
+        return 0
+    rebuilt = 0
+    for user_id, author_id in follows.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        backfill(user_id, author_id)
+        rebuilt += 1
+    return rebuilt
+
+
+def hybrid_ids(user):
+    """id постов гибридной ленты: UNION двух упорядоченных срезов.
+
+    SQLite не разрешает ORDER BY и LIMIT в частях UNION, поэтому каждый
+    срез завёрнут в подзапрос.
+    """
+    limit = settings.POSTS_FEED_COUNT_CAP
+    entries = TimelineEntry.objects.filter(user=user).order_by(
+        '-pub_date'
+    ).values('post_id')[:limit]
+    popular = Post.objects.filter(
+        author_id__in=celebrity_ids(user)
+    ).order_by('-pub_date').values('pk')[:limit]
+    return Post.objects.filter(pk__in=entries).order_by().values('pk').union(
+        Post.objects.filter(pk__in=popular).order_by().values('pk')
+    )
+
+
+def feed_for(user):
+    """Посты авторов, на которых подписан пользователь."""
+    mode = get_mode()
+    if mode == FANOUT:
+        return Post.objects.filter(timeline_entries__user=user).order_by(
+            '-timeline_entries__pub_date'
+        )
+    if mode == HYBRID:
+        return Post.objects.filter(pk__in=hybrid_ids(user))
+    author_ids = follow_graph.followee_ids(user)
+    if len(author_ids) <= MAX_IN_AUTHORS:
+        return Post.objects.filter(author_id__in=list(author_ids))
+    return Post.objects.filter(author__following__user=user)
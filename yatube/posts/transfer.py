@@ -0,0 +1,365 @@
+"""Потоковый импорт и экспорт групп, постов, комментариев и подписок.
+
+Строки читаются и пишутся по одной (NDJSON или CSV), поэтому память
+не зависит от объёма данных. Импорт идёт пачками bulk_create, каждая
+в своей транзакции. Связи передаются естественными ключами: автор
+и подписчик — username (недостающие пользователи создаются без пароля),
+группа — slug; id постов и комментариев сохраняются, поэтому их можно
+загрузить только в пустые таблицы. Уже существующие группы и подписки
+пропускаются. bulk_create обходит сигналы, поэтому после импорта
+счётчики, ленты и поиск пересобираются.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import follow_graph
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE: int = 1000
+FORMATS = ('ndjson', 'csv')
+
+FIELDS = {
+    'groups': ('slug', 'title', 'description'),
+    'posts': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comments': ('id', 'post', 'author', 'text', 'pub_date'),
+    'follows': ('user', 'author'),
+}
+
+EXPORT_QUERIES = {
+    'groups': lambda: Group.objects.values_list(
+        'slug', 'title', 'description'
+    ),
+    'posts': lambda: Post.objects.values_list(
+        'pk', 'author__username', 'group__slug', 'text', 'pub_date', 'image'
+    ),
+    'comments': lambda: Comment.objects.values_list(
+        'pk', 'post_id', 'author__username', 'text', 'pub_date'
+    ),
+    'follows': lambda: Follow.objects.values_list(
+        'user__username', 'author__username'
+    ),
+}
+
+
+class TransferError(ValueError):
+    pass
+
+
+def export_rows(name):
+    fields = FIELDS[name]
+    rows = EXPORT_QUERIES[name]().order_by('pk')
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        yield dict(zip(fields, row))
+
+
+def write_rows(rows, stream, data_format, fields):
+    written = 0
+    if data_format == 'csv':
+        writer = csv.DictWriter(stream, fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                key: value.isoformat() if hasattr(value, 'isoformat')
+                else value
+                for key, value in row.items()
+            })
+            written += 1
+        return written
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in rows:
+        stream.write(encoder.encode(row) + '\n')
+        written += 1
+    return written
+
+
+def read_rows(stream, data_format):
+    """Строки выгрузки вместе с номером строки файла."""
+    if data_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {
+                key: value or None for key, value in row.items()
+            }
+        return
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            raise TransferError(f'Строка {number}: {error}')
+        if not isinstance(row, dict):
+            raise TransferError(f'Строка {number}: ожидается объект JSON')
+        yield number, row
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value) if isinstance(value, str) else value
+    if date is None:
+        raise TransferError(f'Неверная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def user_ids(usernames):
+    """id пользователей по username; недостающие создаются без пароля."""
+    usernames = set(usernames)
+    found = dict(User.objects.filter(username__in=usernames).values_list(
+        'username', 'pk'
+    ))
+    missing = usernames - found.keys()
+    if missing:
+        User.objects.bulk_create(
+            [
+                User(username=username, password=make_password(None))
+                for username in missing
+            ],
+            ignore_conflicts=True,
+        )
+        found.update(User.objects.filter(username__in=missing).values_list(
+            'username', 'pk'
+        ))
+    return found
+
+
+def group_ids(slugs):
+    slugs = set(slugs) - {None}
+    found = dict(Group.objects.filter(slug__in=slugs).values_list(
+        'slug', 'pk'
+    ))
+    missing = slugs - found.keys()
+    if missing:
+        raise TransferError(f'Нет групп: {", ".join(sorted(missing))}')
+    return found
+
+
+def parse_rows(batch, parse):
+    """Разбирает строки пачки; ошибка называет номер строки файла."""
+    parsed = []
+    for number, row in batch:
+        try:
+            parsed.append(parse(row))
+        except KeyError as error:
+            raise TransferError(f'Строка {number}: нет поля {error}')
+        except (TypeError, ValueError) as error:
+            raise TransferError(f'Строка {number}: {error}')
+    return parsed
+
+
+def required(row, field):
+    """Значение обязательного поля; пустое — ошибка с именем поля."""
+    value = row[field]
+    if value in (None, ''):
+        raise ValueError(f'пустое поле {field}')
+    return value
+
+
+def optional_id(value):
+    return int(value) if value not in (None, '') else None
+
+
+def import_groups(batch):
+    rows = {
+        row['slug']: row for row in parse_rows(batch, lambda row: {
+            'slug': required(row, 'slug'),
+            'title': required(row, 'title'),
+            'description': row.get('description') or '',
+        })
+    }
+    existing = set(Group.objects.filter(slug__in=rows).values_list(
+        'slug', flat=True
+    ))
+    groups = [
+        Group(**row) for slug, row in rows.items() if slug not in existing
+    ]
+    Group.objects.bulk_create(groups, ignore_conflicts=True)
+    return len(groups)
+
+
+def import_posts(batch):
+    rows = parse_rows(batch, lambda row: {
+        'id': optional_id(row.get('id')),
+        'author': required(row, 'author'),
+        'group': row.get('group'),
+        'text': required(row, 'text'),
+        'pub_date': parse_date(row.get('pub_date')),
+        'image': row.get('image') or '',
+    })
+    authors = user_ids(row['author'] for row in rows)
+    groups = group_ids(row['group'] for row in rows)
+    posts = [
+        Post(
+            id=row['id'],
+            author_id=authors[row['author']],
+            group_id=groups.get(row['group']),
+            text=row['text'],
+            pub_date=row['pub_date'],
+            updated=row['pub_date'],
+            image=row['image'],
+        )
+        for row in rows
+    ]
+    Post.objects.bulk_create(posts)
+    return len(posts)
+
+
+def import_comments(batch):
+    rows = parse_rows(batch, lambda row: {
+        'id': optional_id(row.get('id')),
+        'post': int(required(row, 'post')),
+        'author': required(row, 'author'),
+        'text': required(row, 'text'),
+        'pub_date': parse_date(row.get('pub_date')),
+    })
+    authors = user_ids(row['author'] for row in rows)
+    post_ids = {row['post'] for row in rows}
+    missing = post_ids - set(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+    )
+    if missing:
+        raise TransferError(
+            f'Нет постов: {", ".join(map(str, sorted(missing)))}'
+        )
+    comments = [
+        Comment(
+            id=row['id'],
+            post_id=row['post'],
+            author_id=authors[row['author']],
+            text=row['text'],
+            pub_date=row['pub_date'],
+        )
+        for row in rows
+    ]
+    Comment.objects.bulk_create(comments)
+    return len(comments)
+
+
+def import_follows(batch):
+    rows = parse_rows(batch, lambda row: (
+        required(row, 'user'), required(row, 'author')
+    ))
+    users = user_ids(username for pair in rows for username in pair)
+    pairs = {
+        (users[user], users[author])
+        for user, author in rows if user != author
+    }
+    existing = set(Follow.objects.filter(
+        user_id__in={user for user, _ in pairs},
+        author_id__in={author for _, author in pairs},
+    ).values_list('user_id', 'author_id'))
+    follows = [
+        Follow(user_id=user, author_id=author)
+        for user, author in pairs - existing
+    ]
+    Follow.objects.bulk_create(follows, ignore_conflicts=True)
+    follow_graph.forget(*{user for user, _ in pairs})
+    return len(follows)
+
+
+IMPORTERS = {
+    'groups': import_groups,
+    'posts': import_posts,
+    'comments': import_comments,
+    'follows': import_follows,
+}
+# Модели, у которых сохраняются id из выгрузки.
+ID_MODELS = {
+    'posts': Post,
+    'comments': Comment,
+}
+
+
+@contextmanager
+def keep_dates():
+    """Отключает auto_now, чтобы сохранить даты из выгрузки.
+
+    Меняет поля моделей на уровне процесса, поэтому годится только
+    для команд управления.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('pub_date'),
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def reset_sequences():
+    """Сдвигает автоинкремент за импортированные id (не нужно SQLite)."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Post, Comment]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def import_rows(name, rows, batch_size=BATCH_SIZE):
+    """Загружает строки (номер, строка) пачками.
+
+    Посты и комментарии сохраняют id из выгрузки, только если таблица
+    до загрузки пуста: в непустую базу строки с id не загружаются,
+    иначе комментарии привязались бы к чужим постам с теми же id.
+    Строки с id и без id в одном файле не смешиваются: новый id мог бы
+    совпасть с id из следующей строки. Возвращает число добавленных строк.
+    """
+    importer = IMPORTERS[name]
+    model = ID_MODELS.get(name)
+    keep_ids = model is None or not model.objects.exists()
+    with_ids = None
+    inserted = 0
+    with keep_dates():
+        for batch in batched(rows, batch_size):
+            for number, row in batch:
+                has_id = row.get('id') not in (None, '')
+                if model is not None and with_ids is None:
+                    with_ids = has_id
+                if not keep_ids and has_id:
+                    raise TransferError(
+                        f'Строка {number}: таблица {name} не пуста, '
+                        'id из выгрузки загружаются только в пустую базу'
+                    )
+                if model is not None and has_id != with_ids:
+                    raise TransferError(
+                        f'Строка {number}: в файле есть строки и с id, '
+                        'и без id'
+                    )
+            try:
+                with transaction.atomic():
+                    inserted += importer(batch)
+            except IntegrityError as error:
+                raise TransferError(
+                    f'Строки {batch[0][0]}–{batch[-1][0]}: {error}'
+                )
+    reset_sequences()
+    return inserted
@@ -0,0 +1,144 @@
+"""Приём картинок постов с ограничением по байтам и пикселям.
+
+Во вью, обёрнутых limit_uploads, загрузка пишется во временный файл
+кусками и перестаёт писаться после POST_IMAGE_MAX_BYTES; остальные
+формы и админка загружают файлы обычными обработчиками Django. Размер
+в пикселях проверяется по заголовку до полного декодирования.
+Перекодирование (снятие EXIF, приведение
+к веб-формату) идёт в ограниченном пуле, чтобы одновременные большие
+загрузки не раздували память процесса.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+WEB_FORMATS = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'PNG': ('.png', 'image/png'),
+    'GIF': ('.gif', 'image/gif'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+_executor = None
+_executor_lock = Lock()
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку на диск и отбрасывает всё сверх лимита.
+
+    Обрезанный файл помечается too_large; вью с этим обработчиком
+    обязано проверить метку (PostForm проверяет).
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.too_large = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            self.too_large = True
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.too_large = self.too_large
+        return uploaded
+
+
+def limit_uploads(view):
+    """Ограничивает загрузки вью и закрывает перекодированные файлы.
+
+    Обработчики загрузки меняются до чтения request.POST, поэтому CSRF
+    проверяется уже после замены (см. документацию Django).
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [LimitedTemporaryFileUploadHandler(request)]
+        try:
+            return protected(request, *args, **kwargs)
+        finally:
+            for _, files in request.FILES.lists():
+                for uploaded in files:
+                    reencoded = getattr(uploaded, 'reencoded', None)
+                    if reencoded is not None:
+                        reencoded.close()
+    return wrapper
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_IMAGE_WORKERS,
+                thread_name_prefix='uploads',
+            )
+        return _executor
+
+
+def is_too_large(uploaded):
+    return getattr(uploaded, 'too_large', False)
+
+
+def pixel_count(uploaded):
+    """Число пикселей по заголовку, без декодирования картинки."""
+    uploaded.seek(0)
+    with Image.open(uploaded) as image:
+        width, height = image.size
+    uploaded.seek(0)
+    return width * height
+
+
+def _reencode(uploaded):
+    uploaded.seek(0)
+    with Image.open(uploaded) as image:
+        source_format = image.format
+        if source_format in WEB_FORMATS and 'exif' not in image.info:
+            uploaded.seek(0)
+            return uploaded
+        image = ImageOps.exif_transpose(image)
+        if source_format in WEB_FORMATS:
+            target_format = source_format
+        elif image.mode in ('RGBA', 'LA', 'P'):
+            target_format = 'PNG'
+        else:
+            target_format = 'JPEG'
+        if target_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        extension, content_type = WEB_FORMATS[target_format]
+        name = os.path.splitext(uploaded.name)[0] + extension
+        result = TemporaryUploadedFile(name, content_type, 0, None)
+        options = {'optimize': True, 'exif': b''}
+        if target_format == 'JPEG':
+            options['quality'] = settings.POST_IMAGE_JPEG_QUALITY
+        if image.info.get('icc_profile'):
+            options['icc_profile'] = image.info['icc_profile']
+        image.save(result, target_format, **options)
+    result.size = result.tell()
+    result.seek(0)
+    return result
+
+
+def normalize(uploaded):
+    """Снимает EXIF и приводит картинку к веб-формату в общем пуле.
+
+    Новый временный файл запоминается в uploaded.reencoded, чтобы
+    limit_uploads закрыл его в конце запроса.
+    """
+    result = get_executor().submit(_reencode, uploaded).result()
+    if result is not uploaded:
+        uploaded.reencoded = result
+    return result
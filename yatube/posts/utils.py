@@ -1,10 +1,245 @@
-from django.core.paginator import Paginator
+import base64
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.template import engines
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core import dataloader
+from . import cards
 
 POSTS_ON_PAGE: int = 10
+COMMENTS_ON_PAGE: int = 20
+# Сколько номеров страниц показывать по обе стороны от текущей.
+PAGE_WINDOW: int = 3
+
+CURSOR_NEXT: str = 'n'
+CURSOR_PREVIOUS: str = 'p'
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации без общего числа записей."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.cursor = cursor
+
+    def __repr__(self):
+        # Используется как ключ {% cache %} в шаблонах лент.
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(
+            CURSOR_NEXT, self.object_list[-1]
+        )
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(
+            CURSOR_PREVIOUS, self.object_list[0]
+        )
+
+
+class CursorPaginator:
+    """Пагинация по ключу (pub_date, id).
+
+    Вместо COUNT(*) и OFFSET каждая страница выбирается условием
+    по ключу последней показанной записи, поэтому страница N стоит
+    столько же, сколько первая.
+    """
+
+    cursor_based = True
+
+    def __init__(self, queryset, per_page, key_field='pub_date'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.key_field = key_field
+
+    def encode_cursor(self, direction, obj):
+        value = getattr(obj, self.key_field)
+        raw = f'{direction}|{value.isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
 
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, значение ключа, id) или None."""
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding).decode()
+            direction, value, pk = raw.split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return None
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or value is None:
+            return None
+        return direction, value, pk
 
-def get_page_context(request, queryset):
-    paginator = Paginator(queryset, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    def get_page(self, cursor=None):
+        position = self.decode_cursor(cursor) if cursor else None
+        forward = position is None or position[0] == CURSOR_NEXT
+        order = '-' if forward else ''
+        queryset = self.queryset.order_by(
+            f'{order}{self.key_field}', f'{order}pk'
+        )
+        if position is not None:
+            _, value, pk = position
+            lookup = 'lt' if forward else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.key_field}__{lookup}': value})
+                | Q(**{self.key_field: value, f'pk__{lookup}': pk})
+            )
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if forward:
+            return CursorPage(
+                object_list, self, has_more, position is not None, cursor
+            )
+        object_list.reverse()
+        return CursorPage(object_list, self, True, has_more, cursor)
+
+
+class CountedPaginator(Paginator):
+    """Paginator без COUNT(*) по всей выборке.
+
+    Общее число берётся из счётчика total (число или функция), а без
+    него — COUNT(*) не больше чем по cap первым записям. Счётчик может
+    отставать (bulk_create обходит сигналы), поэтому решает выборка
+    страницы: она берёт на одну запись больше и поправляет count, если
+    записей оказалось больше или меньше. page_range содержит только
+    PAGE_WINDOW номеров по обе стороны от текущей страницы.
+    """
+
+    def __init__(self, object_list, per_page, total=None, cap=None):
+        super().__init__(object_list, per_page)
+        self.total = total
+        self.cap = cap
+        self.number = 1
+
+    @cached_property
+    def count(self):
+        if self.total is not None:
+            return self.total() if callable(self.total) else self.total
+        if self.cap is not None:
+            return self.object_list[:self.cap].count()
+        return super().count
+
+    def _set_count(self, count):
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+
+    def page(self, number):
+        try:
+            number = self.validate_number(number)
+        except EmptyPage:
+            # Страница за пределами счётчика: проверяем выборкой.
+            number = int(number)
+            if number < 1:
+                raise
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if len(objects) > self.per_page:
+            self._set_count(max(self.count, bottom + len(objects)))
+        elif objects or number == 1:
+            self._set_count(bottom + len(objects))
+        else:
+            self._set_count(self.object_list.count())
+            raise EmptyPage('Страница пуста')
+        self.number = number
+        return self._get_page(objects[:self.per_page], number, self)
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            return self.page(self.num_pages)
+
+    @property
+    def page_range(self):
+        return range(
+            max(1, self.number - PAGE_WINDOW),
+            min(self.num_pages, self.number + PAGE_WINDOW) + 1,
+        )
+
+
+def surrogate_keys(posts):
+    """Ключи для сброса кэша страниц, на которых показаны посты."""
+    keys = set()
+    for post in posts:
+        keys.add(f'post:{post.pk}')
+        keys.add(f'author:{post.author_id}')
+        if post.group_id:
+            keys.add(f'group:{post.group_id}')
+    return keys
+
+
+def template_engine(view):
+    """'jinja2' для вью из POSTS_JINJA2_VIEWS, если движок настроен."""
+    if view not in settings.POSTS_JINJA2_VIEWS:
+        return None
+    if 'jinja2' not in (engine.name for engine in engines.all()):
+        return None
+    return 'jinja2'
+
+
+def get_page_context(request, queryset, cursor=None, total=None, cap=None):
+    """Страница ленты; total и cap передаются в CountedPaginator."""
+    if cursor is None:
+        cursor = settings.POSTS_CURSOR_PAGINATION
+    if cursor:
+        paginator = CursorPaginator(queryset, POSTS_ON_PAGE)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    else:
+        paginator = CountedPaginator(queryset, POSTS_ON_PAGE, total, cap)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    cards.prefetch_cards(page_obj)
     return page_obj
+
+
+def defer_page_context(request, queryset, **kwargs):
+    """Как get_page_context, но выборка откладывается в dataloader.
+
+    Страница выбирается вместе с остальными отложенными запросами вью;
+    возвращает функцию, которая отдаёт page_obj.
+    """
+    data = dataloader.for_request(request)
+    return data.defer(
+        lambda: get_page_context(request, queryset, **kwargs)
+    ).get
+
+
+def get_comments_page(post, cursor=None):
+    """Страница комментариев поста, новые первыми, с авторами."""
+    comments = post.comments.select_related('author').only(
+        'text', 'pub_date', 'post', 'author__username'
+    )
+    return CursorPaginator(comments, COMMENTS_ON_PAGE).get_page(cursor)
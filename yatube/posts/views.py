@@ -1,61 +1,127 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core import dataloader
+from core.db.routers import replica_reads
+from core.page_cache import purged_at, tag_response
+from . import (comment_queue, counters, follow_graph, loaders, search,
+               thumbnails, timeline)
+from .counters import get_author_stats
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .utils import get_page_context
+from .uploads import limit_uploads
+from .utils import (defer_page_context, get_comments_page, get_page_context,
+                    surrogate_keys, template_engine)
 
 
+@replica_reads
 def index(request):
-    post_list = Post.objects.all()
-    context = {'page_obj': get_page_context(request, post_list)}
-    return render(request, 'posts/index.html', context)
+    post_list = Post.objects.for_feed()
+    page_obj = get_page_context(
+        request, post_list,
+        total=lambda: counters.get_feed_count(counters.POSTS_KEY),
+    )
+    context = {'page_obj': page_obj, 'feed_purged': purged_at('feed')}
+    response = render(
+        request, 'posts/index.html', context, using=template_engine('index')
+    )
+    return tag_response(response, 'feed', *surrogate_keys(page_obj))
 
 
+@replica_reads
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts_in_group.all()
+    posts = group.posts_in_group.for_feed()
+    page_obj = get_page_context(
+        request, posts,
+        total=lambda: counters.get_feed_count(counters.group_key(group.pk)),
+    )
     context = {
         'group': group,
-        'page_obj': get_page_context(request, posts),
+        'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    response = render(
+        request, 'posts/group_list.html', context,
+        using=template_engine('group_posts'),
+    )
+    return tag_response(
+        response, f'group:{group.pk}', *surrogate_keys(page_obj)
+    )
 
 
+@replica_reads
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    data = dataloader.for_request(request)
+    author = data.load(loaders.users_by_username, username).get()
+    if author is None:
+        raise Http404('Пользователь не найден')
     following = False
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            author=author,
-            user=request.user
-        ).exists()
-    user_posts = author.posts.all()
-    posts_count = user_posts.count()
+        following = data.defer(
+            lambda: follow_graph.is_following(request.user, author.pk)
+        )
+    posts_count = get_author_stats(author).posts_count
+    page = defer_page_context(
+        request, author.posts.for_feed(), total=posts_count
+    )
+    page_obj = page()
     context = {
-        'following': following,
+        'following': following and following.get(),
         'author': author,
         'posts_count': posts_count,
-        'page_obj': get_page_context(request, user_posts),
+        'page_obj': page_obj,
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(
+        request, 'posts/profile.html', context,
+        using=template_engine('profile'),
+    )
+    return tag_response(
+        response, f'author:{author.pk}', *surrogate_keys(page_obj)
+    )
 
 
+@replica_reads
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    author_posts = post.author.posts.count()
-    post_comments = post.comments.all()
+    data = dataloader.for_request(request)
+    post = data.load(loaders.posts_by_pk, post_id)
+    cursor = request.GET.get('cursor')
+    comments = data.defer(
+        lambda: get_comments_page(Post(pk=post_id), cursor)
+    )
+    post = post.get()
+    if post is None:
+        raise Http404('Пост не найден')
+    author_posts = get_author_stats(post.author).posts_count
     form = CommentForm(request.POST or None)
     context = {
         'form': form,
-        'comments': post_comments,
+        'comments': comments.get(),
         'post': post,
         'author_posts': author_posts,
     }
-    return render(request, 'posts/post_detail.html', context)
+    if comment_queue.is_queued() and 'cursor' not in request.GET:
+        context['pending_comments'] = comment_queue.pending_comments(
+            post, request.user
+        )
+    response = render(request, 'posts/post_detail.html', context)
+    return tag_response(response, *surrogate_keys([post]))
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(post, request.GET.get('cursor')),
+    }
+    response = render(request, 'posts/includes/comments.html', context)
+    return tag_response(response, f'post:{post.pk}')
 
 
 @login_required
+@limit_uploads
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
@@ -63,12 +129,15 @@ def post_create(request):
             post = form.save(commit=False)
             post.author_id = request.user.pk
             post.save()
+            if post.image:
+                thumbnails.schedule(post)
             return redirect('posts:profile', username=request.user)
     context = {'form': form, }
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+@limit_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user != post.author:
@@ -86,14 +155,18 @@ def post_edit(request, post_id):
         }
         return render(request, 'posts/create_post.html', context)
     form.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
     return redirect('posts:post_detail', post_id)
 
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
+    if form.is_valid() and comment_queue.is_queued():
+        comment_queue.enqueue(post.pk, request.user, form.cleaned_data['text'])
+    elif form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
@@ -102,29 +175,50 @@ def add_comment(request, post_id):
 
 
 @login_required
+@replica_reads
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = timeline.feed_for(request.user).for_feed()
     context = {
-        'page_obj': get_page_context(request, posts),
+        'page_obj': get_page_context(
+            request, posts, cap=settings.POSTS_FEED_COUNT_CAP
+        ),
     }
-    return render(request, 'posts/follow.html', context)
+    return render(
+        request, 'posts/follow.html', context,
+        using=template_engine('follow_index'),
+    )
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author and not Follow.objects.filter(
-        author=author,
-        user=request.user
-    ).exists():
-        Follow.objects.create(author=author, user=request.user)
+    if (
+        request.user != author
+        and not follow_graph.is_following(request.user, author.pk)
+    ):
+        try:
+            with transaction.atomic():
+                Follow.objects.create(author=author, user=request.user)
+        except IntegrityError:
+            pass
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follow_obj = Follow.objects.filter(author=author, user=request.user)
-    if follow_obj.exists():
-        follow_obj.delete()
+    if follow_graph.is_following(request.user, author.pk):
+        Follow.objects.filter(author=author, user=request.user).delete()
     return redirect('posts:profile', username=username)
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'results': search.search(
+            query, request.GET.get('cursor'),
+            data=dataloader.for_request(request),
+        ),
+    }
+    return render(request, 'posts/search.html', context)
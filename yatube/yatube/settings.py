@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -19,7 +20,7 @@ INTERNAL_IPS = [
 ]
 
 INSTALLED_APPS = [
-    'posts',
+    'posts.apps.PostsConfig',
     'about',
     'users',
     'core',
@@ -34,11 +35,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -47,12 +52,21 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Без DEBUG шаблоны компилируются один раз на процесс и встраивают
+# include (core/template_loaders.py), как у кэширующего загрузчика
+# Django; с DEBUG правки шаблонов видны без перезапуска сервера.
+TEMPLATE_SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_SOURCE_LOADERS if DEBUG else [
+                ('core.template_loaders.Loader', TEMPLATE_SOURCE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -64,16 +78,52 @@ TEMPLATES = [
     },
 ]
 
+# Jinja2 для лент (core/jinja.py), если пакет установлен; вью из
+# POSTS_JINJA2_VIEWS рендерятся шаблонами из jinja2_templates/.
+if find_spec('jinja2') is not None:
+    TEMPLATES.append({
+        'BACKEND': 'core.jinja.Jinja2',
+        'NAME': 'jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2_templates')],
+        'OPTIONS': {
+            'environment': 'posts.jinja.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    })
+POSTS_JINJA2_VIEWS = []
+
+# Шаблоны приложений по-прежнему ищет app_directories.Loader в loaders.
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки, в которых yatube/asgi.py выполняет Django (см. core/asgi.py).
+ASGI_WORKER_THREADS = 16
+
+# Потоки для параллельных запросов страницы (core/dataloader.py), общие
+# для всех запросов процесса: по числу потоков ASGI, чтобы пул не
+# сдерживал одновременные запросы; 0 или 1 — всё по очереди.
+DATALOADER_THREADS = ASGI_WORKER_THREADS
 
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # Прагмы WAL и другие: core/db/backends/sqlite3/base.py.
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики для чтения (core/db/routers.py); пример: yatube/settings_replica.py.
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_COOKIE = 'primary_pin'
+REPLICA_PIN_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -120,3 +170,61 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+POSTS_CURSOR_PAGINATION = False
+# Лента подписок без счётчика: COUNT(*) не дальше этого числа постов.
+POSTS_FEED_COUNT_CAP = 1000
+
+# Лента подписок: 'join', 'fanout' или 'hybrid' (см. posts/timeline.py).
+POSTS_FOLLOW_FEED = 'join'
+POSTS_FANOUT_MAX_FOLLOWERS = 10000
+POSTS_TIMELINE_BACKFILL = 1000
+FOLLOW_GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+PAGE_CACHE_ENABLED = False
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_MAX_AGE = 60
+
+POST_THUMBNAIL_SIZES = {
+    '960x339': {'crop': 'center', 'upscale': True},
+}
+POST_THUMBNAIL_FEED_SIZE = '960x339'
+POST_THUMBNAIL_WORKERS = 2
+
+# Лимит байт действует только во вью с posts.uploads.limit_uploads.
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+POST_IMAGE_JPEG_QUALITY = 85
+POST_IMAGE_WORKERS = 2
+
+# Поиск: 'auto' (FTS5, если есть), 'fts5' или 'table' (см. posts/search.py).
+POSTS_SEARCH_BACKEND = 'auto'
+# Сколько секунд кэшируется число документов для tf-idf без FTS5.
+POSTS_SEARCH_COUNT_TIMEOUT = 60 * 10
+
+# Метрики запросов (core/metrics.py); 0 отключает проверку бюджета.
+METRICS_ENABLED = True
+METRICS_QUERY_BUDGET = 30
+METRICS_LOG_REQUESTS = False
+# /metrics/ по умолчанию закрыт всем, кроме персонала. Скрейпер передаёт
+# заголовок "Authorization: Bearer <METRICS_TOKEN>". Список адресов
+# годится только без прокси: за ним REMOTE_ADDR у всех клиентов один.
+METRICS_TOKEN = ''
+METRICS_ALLOWED_IPS = []
+
+# Профилирование запросов (core/profiling.py), по умолчанию выключено.
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_SLOW_MS = 500
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Запись комментариев: 'sync' или 'queue' (см. posts/comment_queue.py).
+COMMENT_INGESTION = 'sync'
+COMMENT_QUEUE_DIR = os.path.join(BASE_DIR, 'comment_queue')
+COMMENT_QUEUE_BATCH_SIZE = 500
+COMMENT_QUEUE_INTERVAL = 1.0
+COMMENT_QUEUE_FSYNC = True
+COMMENT_QUEUE_PENDING_TIMEOUT = 60 * 10
@@ -0,0 +1,21 @@
+"""Локальная проверка реплик: две базы SQLite вместо основной и реплики.
+
+    export DJANGO_SETTINGS_MODULE=yatube.settings_replica
+    python manage.py migrate
+    python manage.py sync_replica
+    python manage.py runserver
+
+Реплика — копия основной базы, её обновляет команда sync_replica
+(разово или с --loop).
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_REPLICAS = ['replica']